@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+
+import argparse
+import random
+from time import perf_counter
+from classes.adjacency_list import AdjacencyList
+from classes.graph_traverser import GraphTraverser, TraversalOrder
+from classes.traversal_stats import HistogramSink
+
+# Benchmarks for GraphTraverser, run from the graphs directory:
+#   python benchmarks.py [suite ...] [--max-vertices N] [--repeat R]
+
+def chain_graph(num_vertices):
+  return AdjacencyList([[vertex + 1] for vertex in range(num_vertices - 1)] + [[]])
+
+def star_graph(num_vertices):
+  return AdjacencyList([list(range(1, num_vertices))] + [[] for _ in range(num_vertices - 1)])
+
+def random_graph(num_vertices, degree=4, seed=0):
+  generator = random.Random(seed)
+  return AdjacencyList([
+    [generator.randrange(num_vertices) for _ in range(degree)]
+    for _ in range(num_vertices)
+  ])
+
+GRAPHS = [('chain', chain_graph), ('star', star_graph), ('random', random_graph)]
+
+class RecursiveTraverser:
+  '''
+  The recursive depth first traversal GraphTraverser used before it moved to an
+  explicit stack, kept as the baseline. It restarts from every unvisited vertex so
+  it does the same work as the iterative version.
+  '''
+  def __init__(self, edges):
+    self.edges = edges
+
+  def apply_depth_first(self, call_back):
+    self.visited = [False] * len(self.edges)
+    self.call_back = call_back
+    for origin in range(len(self.edges)):
+      self.__traverse_depth_first(origin)
+
+  def __traverse_depth_first(self, origin):
+    if self.visited[origin]:
+      return
+
+    self.call_back(origin, self.edges, self.visited, TraversalOrder.PRE_ORDER)
+
+    self.visited[origin] = True
+    for destination in self.edges[origin]:
+      self.__traverse_depth_first(destination)
+
+    self.call_back(origin, self.edges, self.visited, TraversalOrder.POST_ORDER)
+
+def best_time(function, repeat):
+  best = None
+  for _ in range(repeat):
+    started = perf_counter()
+    function()
+    elapsed = perf_counter() - started
+    best = elapsed if best is None else min(best, elapsed)
+  return best
+
+def benchmark_depth_first(sizes, repeat):
+  '''
+  apply_depth_first with a no-op call back, iterative vs the recursive baseline
+  '''
+  call_back = lambda vertex, edges, visited, order: None
+  print(f"{'graph':<8} {'vertices':>10} {'iterative':>11} {'recursive':>15}")
+  for name, build in GRAPHS:
+    for size in sizes:
+      graph = build(size)
+      iterative = best_time(lambda: GraphTraverser(graph).apply_depth_first(call_back), repeat)
+      try:
+        recursive = f'{best_time(lambda: RecursiveTraverser(graph).apply_depth_first(call_back), repeat):.4f}s'
+      except RecursionError:
+        recursive = 'RecursionError'
+      print(f'{name:<8} {size:>10} {iterative:>10.4f}s {recursive:>15}')
+
+def benchmark_instrumentation(sizes, repeat):
+  '''
+  Depth and breadth first traversals without a sink vs with a HistogramSink, which
+  shows what collecting TraversalStats costs
+  '''
+  call_back = lambda vertex, edges, visited, order: None
+  traversals = [
+    ('dfs', lambda traverser: traverser.apply_depth_first(call_back)),
+    ('bfs', lambda traverser: traverser.bfs_levels()),
+  ]
+  print(f"{'graph':<8} {'vertices':>10} {'traversal':>9} {'no sink':>10} {'sink':>10} {'overhead':>9}")
+  for name, build in GRAPHS:
+    for size in sizes:
+      graph = build(size)
+      for traversal, traverse in traversals:
+        plain, instrumented = GraphTraverser(graph), GraphTraverser(graph, HistogramSink())
+        plain_time = best_time(lambda: traverse(plain), repeat)
+        instrumented_time = best_time(lambda: traverse(instrumented), repeat)
+        overhead = instrumented_time / plain_time - 1
+        print(f'{name:<8} {size:>10} {traversal:>9} {plain_time:>9.4f}s {instrumented_time:>9.4f}s {overhead:>9.1%}')
+
+BENCHMARKS = { 'depth_first': benchmark_depth_first, 'instrumentation': benchmark_instrumentation }
+
+def main(argv=None):
+  parser = argparse.ArgumentParser(description='Benchmark GraphTraverser')
+  parser.add_argument('suites', nargs='*', default=list(BENCHMARKS), help=f"benchmarks to run: {', '.join(BENCHMARKS)} (default: all)")
+  parser.add_argument('--max-vertices', type=int, default=10**6, help='largest graph size, sizes go up in powers of 10 from 1e3 (default: 1e6)')
+  parser.add_argument('--repeat', type=int, default=3, help='runs per measurement, the best is reported (default: 3)')
+  args = parser.parse_args(argv)
+  for suite in args.suites:
+    if suite not in BENCHMARKS:
+      parser.error(f'Invalid benchmark: {suite}')
+
+  sizes = [10**exponent for exponent in range(3, 8) if 10**exponent <= args.max_vertices]
+  for suite in args.suites:
+    print(f'# {suite}')
+    BENCHMARKS[suite](sizes, args.repeat)
+
+if __name__ == '__main__':
+  main()
@@ -5,6 +5,16 @@ class AdjacencyList:
     self.num_vertices = len(edges)
     self.edges = edges
     self.__validate()
+
+  @staticmethod
+  def open_mmap(path):
+    '''
+    Opens a graph file written by `graph_file.write_graph` as a read-only memory map.
+    Returns a `CompressedAdjacencyList`, which shares this class's interface.
+    '''
+    # Imported here so that importing this module doesn't load the graph file reader
+    from classes.graph_file import open_graph
+    return open_graph(path)
   
   def __len__(self):
     return self.num_vertices
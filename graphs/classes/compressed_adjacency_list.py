@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+
+from array import array
+from bisect import bisect_left
+
+class CompressedAdjacencyList:
+  '''
+  A compressed sparse row (CSR) representation of a graph. Rather than one Python
+  list per vertex, all destinations are packed into a single flat `targets` buffer
+  and vertex `v` owns the slice `targets[offsets[v]:offsets[v+1]]`. Each slice is
+  kept sorted so that `has_edge_to` is a binary search rather than a linear scan.
+  Weighted graphs carry a parallel `weights` buffer, where `weights[i]` is the weight
+  of the edge ending at `targets[i]`.
+
+  Exposes the same `__len__`/`__getitem__`/`__contains__`/`has_edge_to` interface as
+  `AdjacencyList`, so it can be handed to a `GraphTraverser` as is.
+
+  O(v+e) space (8 bytes per vertex and per edge, plus 8 per edge weight)
+  '''
+  TYPECODE = 'q'
+  WEIGHT_TYPECODE = 'd'
+
+  def __init__(self, offsets, targets, weights=None):
+    self.offsets = offsets
+    self.targets = targets
+    self.weights = weights
+    self.num_vertices = len(offsets) - 1
+    self.__validate()
+
+  @classmethod
+  def from_edge_list(cls, num_vertices, edge_list):
+    '''
+    Builds the graph from an iterable of (origin, destination) pairs, or of
+    (origin, destination, weight) triples for a weighted graph, using a counting sort
+    over the origins so no intermediate list-of-lists is ever allocated.
+
+    O(v+e*log(d)) time | O(v+e) space, where d is the largest out degree
+    '''
+    edge_list = edge_list if isinstance(edge_list, list) else list(edge_list)
+    weighted = len(edge_list) > 0 and len(edge_list[0]) == 3
+
+    # Count the out degree of every vertex, then turn the counts into offsets
+    offsets = array(cls.TYPECODE, bytes(8 * (num_vertices + 1)))
+    for edge in edge_list:
+      origin, destination = edge[0], edge[1]
+      if not 0 <= origin < num_vertices or not 0 <= destination < num_vertices:
+        raise IndexError(f"Edge '{(origin, destination)}' references an invalid vertex")
+      offsets[origin + 1] += 1
+    for vertex in range(num_vertices):
+      offsets[vertex + 1] += offsets[vertex]
+
+    # Scatter each destination into the next free slot of its origin's run
+    targets = array(cls.TYPECODE, bytes(8 * len(edge_list)))
+    weights = array(cls.WEIGHT_TYPECODE, bytes(8 * len(edge_list))) if weighted else None
+    cursor = offsets[:-1]
+    for edge in edge_list:
+      origin = edge[0]
+      targets[cursor[origin]] = edge[1]
+      if weighted:
+        weights[cursor[origin]] = edge[2]
+      cursor[origin] += 1
+
+    cls._sort_runs(offsets, targets, weights)
+    return cls(offsets, targets, weights)
+
+  @classmethod
+  def from_adjacency_list(cls, edges):
+    '''
+    Builds the graph from the list-of-lists form (or an `AdjacencyList` instance).
+
+    O(v+e*log(d)) time | O(v+e) space
+    '''
+    offsets = array(cls.TYPECODE, [0])
+    targets = array(cls.TYPECODE)
+    for vertex in range(len(edges)):
+      targets.extend(sorted(edges[vertex]))
+      offsets.append(len(targets))
+
+    num_vertices = len(offsets) - 1
+    for destination in targets:
+      if not 0 <= destination < num_vertices:
+        raise IndexError(f"Vertex '{destination}' is not a valid vertex")
+    return cls(offsets, targets)
+
+  @staticmethod
+  def _sort_runs(offsets, targets, weights=None):
+    for vertex in range(len(offsets) - 1):
+      start, stop = offsets[vertex], offsets[vertex + 1]
+      if stop - start <= 1:
+        continue
+      if weights is None:
+        targets[start:stop] = array(targets.typecode, sorted(targets[start:stop]))
+      else:
+        run = sorted(zip(targets[start:stop], weights[start:stop]))
+        targets[start:stop] = array(targets.typecode, (target for target, _ in run))
+        weights[start:stop] = array(weights.typecode, (weight for _, weight in run))
+
+  def transpose(self):
+    '''
+    Returns a new graph with every edge (and its weight) reversed. Each edge is
+    scattered straight into its destination's run, so the runs come out sorted.
+
+    O(v+e) time | O(v+e) space
+    '''
+    offsets = array(self.TYPECODE, bytes(8 * (self.num_vertices + 1)))
+    for destination in self.targets:
+      offsets[destination + 1] += 1
+    for vertex in range(self.num_vertices):
+      offsets[vertex + 1] += offsets[vertex]
+
+    targets = array(self.TYPECODE, bytes(8 * len(self.targets)))
+    weights = None if self.weights is None else array(self.WEIGHT_TYPECODE, bytes(8 * len(self.targets)))
+    cursor = offsets[:-1]
+    for origin in range(self.num_vertices):
+      for index in range(self.offsets[origin], self.offsets[origin + 1]):
+        destination = self.targets[index]
+        targets[cursor[destination]] = origin
+        if weights is not None:
+          weights[cursor[destination]] = self.weights[index]
+        cursor[destination] += 1
+    return CompressedAdjacencyList(offsets, targets, weights)
+
+  def __len__(self):
+    return self.num_vertices
+
+  def __contains__(self, vertex):
+    return 0 <= vertex < self.num_vertices
+
+  def __getitem__(self, vertex):
+    if not vertex in self:
+      raise IndexError(f"Vertex '{vertex}' is not a valid vertex")
+    # A memoryview slice gives the caller the neighbor run without copying it
+    return memoryview(self.targets)[self.offsets[vertex]:self.offsets[vertex + 1]]
+
+  def __validate(self):
+    if self.num_vertices <= 0:
+      raise Exception("Constructor arg 'offsets' must describe at least one vertex")
+    if self.offsets[0] != 0 or self.offsets[-1] != len(self.targets):
+      raise Exception("Constructor arg 'offsets' does not span 'targets'")
+    if self.weights is not None and len(self.weights) != len(self.targets):
+      raise Exception("Constructor arg 'weights' must hold one weight per target")
+
+  def num_edges(self):
+    return len(self.targets)
+
+  def degree(self, vertex):
+    if not vertex in self:
+      raise IndexError(f"Vertex '{vertex}' is not a valid vertex")
+    return self.offsets[vertex + 1] - self.offsets[vertex]
+
+  def is_weighted(self):
+    return self.weights is not None
+
+  def edge_weights(self, vertex):
+    '''
+    Returns the weights of the vertex's out edges, parallel to `self[vertex]`
+    '''
+    if not vertex in self:
+      raise IndexError(f"Vertex '{vertex}' is not a valid vertex")
+    if self.weights is None:
+      raise Exception('Graph is not weighted')
+    return memoryview(self.weights)[self.offsets[vertex]:self.offsets[vertex + 1]]
+
+  def has_edge_to(self, origin, destination):
+    return self.__find_edge(origin, destination) >= 0
+
+  def weight(self, origin, destination):
+    '''
+    Returns the weight of the edge from origin to destination
+    '''
+    if self.weights is None:
+      raise Exception('Graph is not weighted')
+    index = self.__find_edge(origin, destination)
+    if index < 0:
+      raise KeyError(f"No edge from '{origin}' to '{destination}'")
+    return self.weights[index]
+
+  def __find_edge(self, origin, destination):
+    if not self.__contains__(origin) or not self.__contains__(destination):
+      return -1
+
+    # Binary search the sorted neighbor run of the origin vertex
+    start, stop = self.offsets[origin], self.offsets[origin + 1]
+    index = bisect_left(self.targets, destination, start, stop)
+    return index if index < stop and self.targets[index] == destination else -1
+
+  def nbytes(self):
+    '''
+    The number of bytes held by the offsets, targets and weights buffers
+    '''
+    buffers = [self.offsets, self.targets] + ([] if self.weights is None else [self.weights])
+    return sum(len(buffer) * buffer.itemsize for buffer in buffers)
+
+# Test cases
+_edges = [[2, 1], [3, 4], [], [0], [2]]
+_graph = CompressedAdjacencyList.from_adjacency_list(_edges)
+assert len(_graph) == 5
+assert list(_graph[0]) == [1, 2]
+assert list(_graph[2]) == []
+assert _graph.has_edge_to(0, 2) and _graph.has_edge_to(4, 2)
+assert not _graph.has_edge_to(2, 0) and not _graph.has_edge_to(0, 5)
+assert 4 in _graph and 5 not in _graph
+assert _graph.num_edges() == 6 and _graph.degree(1) == 2
+
+_from_pairs = CompressedAdjacencyList.from_edge_list(5, [(0, 2), (1, 4), (0, 1), (3, 0), (1, 3), (4, 2)])
+assert _from_pairs.offsets == _graph.offsets and _from_pairs.targets == _graph.targets
+
+_weighted = CompressedAdjacencyList.from_edge_list(3, [(0, 2, 1.5), (0, 1, 4.0), (2, 1, 2.0)])
+assert list(_weighted[0]) == [1, 2] and list(_weighted.edge_weights(0)) == [4.0, 1.5]
+assert _weighted.weight(2, 1) == 2.0 and _weighted.nbytes() == 8 * (4 + 3 + 3)
+_reversed = _weighted.transpose()
+assert list(_reversed[1]) == [0, 2] and list(_reversed.edge_weights(1)) == [4.0, 2.0]
+assert _reversed.transpose().targets == _weighted.targets
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+
+from enum import Enum
+from classes.adjacency_list import AdjacencyList
+from classes.graph_traverser import GraphTraverser
+
+class EdgeChange(Enum):
+  ADDED = 1
+  REMOVED = -1
+
+class DynamicAdjacencyList(AdjacencyList):
+  '''
+  A mutable `AdjacencyList` supporting edge insertion and deletion. Every change is
+  appended to `changes` (a delta log of (EdgeChange, origin, destination) entries)
+  and passed to each registered listener as it happens, so derived results can be
+  maintained incrementally instead of being recomputed from scratch. Validators see
+  every change before it's made, and can reject it by raising.
+
+  Predecessor lists are kept alongside the edges so listeners can walk the graph
+  backwards.
+  '''
+  def __init__(self, edges):
+    super().__init__([list(destinations) for destinations in edges])
+    self.predecessors = [[] for _ in range(self.num_vertices)]
+    for origin, destinations in enumerate(self.edges):
+      for destination in destinations:
+        self.__check_vertex(destination)
+        self.predecessors[destination].append(origin)
+    self.changes = []
+    self.validators = []
+    self.listeners = []
+
+  def add_listener(self, listener):
+    '''
+    Registers a call back invoked as listener(change, origin, destination) after every
+    edge insertion or deletion
+    '''
+    self.listeners.append(listener)
+
+  def add_validator(self, validator):
+    '''
+    Registers a call back invoked as validator(change, origin, destination) before every
+    edge insertion or deletion. A validator rejects the change by raising, which leaves
+    the graph, its delta log and its listeners untouched
+    '''
+    self.validators.append(validator)
+
+  def add_vertex(self):
+    '''
+    Appends a new vertex with no edges and returns it
+    '''
+    self.edges.append([])
+    self.predecessors.append([])
+    self.num_vertices += 1
+    return self.num_vertices - 1
+
+  def add_edge(self, origin, destination):
+    '''
+    Adds an edge from origin to destination, returning False if it already existed
+
+    O(d) time, where d is the out degree of the origin
+    '''
+    self.__check_vertex(origin)
+    self.__check_vertex(destination)
+    if destination in self.edges[origin]:
+      return False
+
+    self.__validate(EdgeChange.ADDED, origin, destination)
+    self.edges[origin].append(destination)
+    self.predecessors[destination].append(origin)
+    self.__record(EdgeChange.ADDED, origin, destination)
+    return True
+
+  def remove_edge(self, origin, destination):
+    '''
+    Removes the edge from origin to destination, returning False if it didn't exist
+
+    O(d) time, where d is the larger of the origin's out degree and the destination's
+    in degree
+    '''
+    self.__check_vertex(origin)
+    self.__check_vertex(destination)
+    if destination not in self.edges[origin]:
+      return False
+
+    self.__validate(EdgeChange.REMOVED, origin, destination)
+    self.edges[origin].remove(destination)
+    self.predecessors[destination].remove(origin)
+    self.__record(EdgeChange.REMOVED, origin, destination)
+    return True
+
+  def changes_since(self, version):
+    '''
+    Returns the changes made after the given version, where a version is the length
+    of the delta log at some earlier point (e.g. `len(graph.changes)`)
+    '''
+    return self.changes[version:]
+
+  def __validate(self, change, origin, destination):
+    for validator in self.validators:
+      validator(change, origin, destination)
+
+  def __record(self, change, origin, destination):
+    self.changes.append((change, origin, destination))
+    for listener in self.listeners:
+      listener(change, origin, destination)
+
+  def __check_vertex(self, vertex):
+    if not 0 <= vertex < self.num_vertices:
+      raise IndexError(f"Vertex '{vertex}' is not a valid vertex")
+
+class IncrementalReachability:
+  '''
+  Maintains the set of vertices reachable from a root of a `DynamicAdjacencyList` as
+  edges come and go. Updates only touch the region of the graph whose reachability
+  could have changed:
+   * Inserting an edge into an unreached vertex explores from that vertex alone
+   * Deleting an edge out of a reached vertex re-checks the vertices reachable
+     through its destination, and re-reaches those that still have a reached
+     predecessor
+  '''
+  def __init__(self, graph, root):
+    if not 0 <= root < len(graph):
+      raise IndexError(f"Vertex '{root}' is not a valid vertex")
+    self.graph = graph
+    self.root = root
+    self.reached = bytearray(len(graph))
+    self.__reach([root])
+    graph.add_listener(self.__on_change)
+
+  def __contains__(self, vertex):
+    return vertex < len(self.reached) and self.reached[vertex] == 1
+
+  def reachable_vertices(self):
+    return [vertex for vertex in range(len(self.reached)) if self.reached[vertex]]
+
+  def __on_change(self, change, origin, destination):
+    # Vertices added since the last change start out unreached
+    if len(self.reached) < len(self.graph):
+      self.reached.extend(bytes(len(self.graph) - len(self.reached)))
+
+    if not self.reached[origin]:
+      return
+    if change == EdgeChange.ADDED:
+      self.__reach([destination])
+    elif change == EdgeChange.REMOVED and destination != self.root:
+      self.__recheck(destination)
+
+  def __reach(self, sources):
+    edges, reached = self.graph.edges, self.reached
+    stack = [source for source in sources if not reached[source]]
+    for source in stack:
+      reached[source] = 1
+    while stack:
+      for destination in edges[stack.pop()]:
+        if not reached[destination]:
+          reached[destination] = 1
+          stack.append(destination)
+
+  def __recheck(self, origin):
+    edges, predecessors, reached = self.graph.edges, self.graph.predecessors, self.reached
+
+    # Every vertex whose reachability may have depended on the deleted edge is reachable
+    # from its destination through reached vertices. Provisionally unreach all of them
+    affected, stack = [origin], [origin]
+    reached[origin] = 0
+    while stack:
+      for destination in edges[stack.pop()]:
+        if reached[destination] and destination != self.root:
+          reached[destination] = 0
+          affected.append(destination)
+          stack.append(destination)
+
+    # Any affected vertex with a predecessor outside the affected region is still
+    # reachable, and so is everything it reaches
+    self.__reach([
+      vertex for vertex in affected
+      if any(reached[predecessor] for predecessor in predecessors[vertex])
+    ])
+
+# Test cases
+_graph = DynamicAdjacencyList([[1], [2], [], [4], []])
+_reachability = IncrementalReachability(_graph, 0)
+assert _reachability.reachable_vertices() == [0, 1, 2]
+_graph.add_edge(2, 3)
+assert _reachability.reachable_vertices() == [0, 1, 2, 3, 4]
+_graph.add_edge(0, 3)
+_graph.remove_edge(2, 3)
+assert _reachability.reachable_vertices() == [0, 1, 2, 3, 4]
+_graph.remove_edge(0, 1)
+assert _reachability.reachable_vertices() == [0, 3, 4]
+_graph.add_edge(_graph.add_vertex(), 0)
+assert _reachability.reachable_vertices() == [0, 3, 4] and 5 not in _reachability
+assert len(_graph.changes) == 5 and _graph.changes_since(4) == [(EdgeChange.ADDED, 5, 0)]
+
+# A rejected change reaches neither the graph nor any listener
+def _reject_edges_into_root(change, origin, destination):
+  if change == EdgeChange.ADDED and destination == 0:
+    raise Exception(f'Edge ({origin}, {destination}) would create a cycle')
+
+_graph = DynamicAdjacencyList([[1], [], [0]])
+_graph.add_validator(_reject_edges_into_root)
+_reachability = IncrementalReachability(_graph, 1)
+try:
+  _graph.add_edge(1, 0)
+  assert False
+except Exception as error:
+  assert 'cycle' in str(error)
+assert _graph.edges == [[1], [], [0]] and _graph.predecessors == [[2], [0], []] and not _graph.changes
+assert _reachability.reachable_vertices() == [1]
+_graph.add_edge(1, 2)
+assert _reachability.reachable_vertices() == [0, 1, 2]
+
+# A traverser over a mutable graph sees every change, bottom-up steps included
+_graph = DynamicAdjacencyList([[1], [], []])
+_traverser = GraphTraverser(_graph)
+assert list(_traverser.bfs_levels([0], True)) == [0, 1, -1]
+_graph.add_edge(1, 2)
+assert list(_traverser.bfs_levels([0], True)) == list(_traverser.bfs_levels([0])) == [0, 1, 2]
+_graph.add_edge(2, _graph.add_vertex())
+assert list(_traverser.bfs_levels([0], True)) == list(_traverser.bfs_levels([0])) == [0, 1, 2, 3]
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+
+import mmap
+import os
+import struct
+import tempfile
+import sys
+from array import array
+from classes.compressed_adjacency_list import CompressedAdjacencyList
+
+# File layout (all numbers little-endian):
+#   header  | magic (8 bytes), version (u32), flags (u32), vertices (i64), edges (i64)
+#   offsets | (vertices + 1) x i64
+#   targets | edges x i64
+#   weights | edges x f64, only present when the WEIGHTED flag is set
+MAGIC = b'CSRGRAPH'
+VERSION = 1
+HEADER = struct.Struct('<8sIIqq')
+WEIGHTED = 1
+
+def write_graph(path, graph):
+  '''
+  Writes the graph (an `AdjacencyList`, list-of-lists or `CompressedAdjacencyList`) to
+  the given path in the binary CSR format read by `open_graph`
+
+  O(v+e) time | O(v+e) space
+  '''
+  if not isinstance(graph, CompressedAdjacencyList):
+    graph = CompressedAdjacencyList.from_adjacency_list(graph)
+
+  flags = WEIGHTED if graph.is_weighted() else 0
+  buffers = [graph.offsets, graph.targets] + ([graph.weights] if graph.is_weighted() else [])
+  with open(path, 'wb') as file:
+    file.write(HEADER.pack(MAGIC, VERSION, flags, len(graph), graph.num_edges()))
+    for buffer in buffers:
+      file.write(_to_little_endian(buffer))
+
+def open_graph(path):
+  '''
+  Maps a graph written by `write_graph` into memory read-only and returns it as a
+  `CompressedAdjacencyList` viewing the mapped pages directly. Nothing is parsed or
+  copied, so opening is O(1) regardless of the graph's size, processes opening the
+  same file share the page cache, and only the pages actually touched are read.
+
+  O(1) time | O(1) space
+  '''
+  with open(path, 'rb') as file:
+    mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+  if len(mapping) < HEADER.size:
+    raise Exception(f"File '{path}' is too small to hold a graph header")
+  magic, version, flags, num_vertices, num_edges = HEADER.unpack_from(mapping)
+  if magic != MAGIC:
+    raise Exception(f"File '{path}' is not a graph file")
+  if version != VERSION:
+    raise Exception(f"File '{path}' has unsupported version {version}")
+
+  offsets_start = HEADER.size
+  targets_start = offsets_start + 8 * (num_vertices + 1)
+  targets_stop = weights_start = targets_start + 8 * num_edges
+  weights_stop = weights_start + (8 * num_edges if flags & WEIGHTED else 0)
+  if len(mapping) != weights_stop:
+    raise Exception(f"File '{path}' is truncated or corrupt")
+
+  view = memoryview(mapping)
+  offsets = _from_little_endian(view[offsets_start:targets_start], 'q')
+  targets = _from_little_endian(view[targets_start:targets_stop], 'q')
+  weights = _from_little_endian(view[weights_start:weights_stop], 'd') if flags & WEIGHTED else None
+  return CompressedAdjacencyList(offsets, targets, weights)
+
+def _to_little_endian(buffer):
+  if sys.byteorder == 'little':
+    return memoryview(buffer).cast('B')
+  swapped = array(memoryview(buffer).format, buffer)
+  swapped.byteswap()
+  return swapped.tobytes()
+
+def _from_little_endian(view, typecode):
+  if sys.byteorder == 'little':
+    return view.cast(typecode)
+  # Big-endian hosts can't view the file in place, so fall back to a swapped copy
+  swapped = array(typecode)
+  swapped.frombytes(view.tobytes())
+  swapped.byteswap()
+  return swapped
+
+# Test cases
+def _check_round_trip():
+  with tempfile.TemporaryDirectory() as directory:
+    path = os.path.join(directory, 'graph.bin')
+    write_graph(path, [[2, 1], [3, 4], [], [0], [2]])
+    graph = open_graph(path)
+    assert len(graph) == 5 and graph.num_edges() == 6
+    assert list(graph[0]) == [1, 2] and list(graph[2]) == []
+    assert graph.has_edge_to(4, 2) and not graph.has_edge_to(2, 4)
+    assert not graph.is_weighted()
+    del graph
+
+    write_graph(path, CompressedAdjacencyList.from_edge_list(2, [(0, 1, 0.5), (1, 0, 2.5)]))
+    graph = open_graph(path)
+    assert graph.weight(0, 1) == 0.5 and list(graph.edge_weights(1)) == [2.5]
+    del graph
+
+if __name__ == '__main__':
+  # Writes files to a temporary directory, so only runs as a script
+  _check_round_trip()
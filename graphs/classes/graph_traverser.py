@@ -1,34 +1,470 @@
 #!/usr/bin/env python3
 
+import sys
+from array import array
 from enum import Enum
+from io import StringIO
+from time import perf_counter
+from classes.compressed_adjacency_list import CompressedAdjacencyList
+from classes.traversal_stats import HistogramSink, JsonSink, TraversalKind, TraversalStats
+from classes.visited_states import VisitedStates
 
 class TraversalOrder(Enum):
   PRE_ORDER = -1
   POST_ORDER = 1
 
 class GraphTraverser:
-  def __init__(self, edges):
+  # Direction optimizing breadth first search switches to bottom-up steps once the
+  # frontier's out edges exceed 1/ALPHA of the unexplored edges, and back to top-down
+  # steps once the frontier holds fewer than 1/BETA of the vertices (Beamer et al.)
+  ALPHA = 14
+  BETA = 24
+
+  def __init__(self, edges, sink=None):
+    '''
+    Instrumentation is opt-in: when a sink (see `traversal_stats`) is given, every
+    traversal collects a `TraversalStats` which is passed to `sink.record` once the
+    traversal finishes or is abandoned. Without a sink the traversals run their
+    uninstrumented loops and pay nothing for it.
+    '''
     self.edges = edges
+    self.visited = None
+    self.visited_in_use = False
+    self.predecessors = None
+    self.predecessors_version = None
+    self.sink = sink
+    self.last_stats = None
   
-  def __reset_visited(self):
-    self.visited = [False] * len(self.edges)
+  def __acquire_visited(self):
+    # Traversals share one visited buffer, reset in O(1) time. A traversal started
+    # while another is still live (a suspended generator, or one started from a call
+    # back) gets a buffer of its own, so neither sees the other's marks
+    num_vertices = len(self.edges)
+    if self.visited_in_use:
+      return VisitedStates(num_vertices)
+    if self.visited is None or len(self.visited) != num_vertices:
+      self.visited = VisitedStates(num_vertices)
+    else:
+      self.visited.reset()
+    self.visited_in_use = True
+    return self.visited
+
+  def __release_visited(self, visited):
+    if visited is self.visited:
+      self.visited_in_use = False
 
   def apply_depth_first(self, call_back):
-    self.__reset_visited()
+    '''
+    Applies the call back to every vertex of the graph in depth first order, once
+    before its descendants are explored (PRE_ORDER) and once after (POST_ORDER).
+    Traversal starts from vertex 0 and then from each vertex still unvisited, so
+    every component of the graph is covered.
+
+    O(v+e) time | O(v) space
+    '''
     self.__set_call_back(call_back)
-    self.__traverse_depth_first(0)
+    call_back, edges = self.call_back, self.edges
+    visited = self.__acquire_visited()
+    try:
+      if self.sink is None:
+        for vertex, order in self.__iter_depth_first_over(visited, True, True):
+          call_back(vertex, edges, visited, order)
+        return
+
+      stats = TraversalStats(TraversalKind.DEPTH_FIRST)
+      for vertex, order in self.__iter_depth_first_over(visited, True, True, stats):
+        started = perf_counter()
+        call_back(vertex, edges, visited, order)
+        stats.callback_seconds += perf_counter() - started
+      self.__record(stats)
+    finally:
+      self.__release_visited(visited)
   
   def __set_call_back(self, call_back):
     self.call_back = call_back
 
-  def __traverse_depth_first(self, origin):
-    if self.visited[origin]:
+  def __record(self, stats):
+    self.last_stats = stats
+    self.sink.record(stats)
+
+  def __iter_recorded(self, events, stats):
+    # Records the stats of a traversal consumed through a generator, including one
+    # the consumer stopped early
+    try:
+      yield from events
+    finally:
+      self.__record(stats)
+
+  def iter_events(self):
+    '''
+    Lazily yields a (vertex, TraversalOrder) pair for every step of a depth first
+    traversal over all components. Each PRE_ORDER event is yielded before its vertex
+    is marked visited, matching the state `apply_depth_first` call backs observe.
+    '''
+    return self.__iter_depth_first_recorded(pre_order=True, post_order=True)
+
+  def iter_preorder(self):
+    '''
+    Lazily yields vertices in depth first pre-order
+    '''
+    for vertex, _ in self.__iter_depth_first_recorded(pre_order=True, post_order=False):
+      yield vertex
+
+  def iter_postorder(self):
+    '''
+    Lazily yields vertices in depth first post-order
+    '''
+    for vertex, _ in self.__iter_depth_first_recorded(pre_order=False, post_order=True):
+      yield vertex
+
+  def __iter_depth_first_recorded(self, pre_order, post_order):
+    if self.sink is None:
+      return self.__iter_depth_first(pre_order, post_order)
+    stats = TraversalStats(TraversalKind.DEPTH_FIRST)
+    return self.__iter_recorded(self.__iter_depth_first(pre_order, post_order, stats), stats)
+
+  def __iter_depth_first(self, pre_order, post_order, stats=None):
+    visited = self.__acquire_visited()
+    try:
+      yield from self.__iter_depth_first_over(visited, pre_order, post_order, stats)
+    finally:
+      self.__release_visited(visited)
+
+  def __iter_depth_first_over(self, visited, pre_order, post_order, stats=None):
+    for origin in range(len(self.edges)):
+      if visited.states[origin] != visited.visited_marker:
+        if stats is None:
+          yield from self.__traverse_depth_first(visited, origin, pre_order, post_order)
+        else:
+          yield from self.__traverse_depth_first_instrumented(visited, origin, pre_order, post_order, stats)
+
+  def __traverse_depth_first(self, visited, origin, pre_order, post_order):
+    # Read and write the visited byte states directly in the hot loop
+    edges = self.edges
+    states, visited_marker = visited.states, visited.visited_marker
+    PRE_ORDER, POST_ORDER = TraversalOrder.PRE_ORDER, TraversalOrder.POST_ORDER
+
+    if pre_order:
+      yield origin, PRE_ORDER
+    states[origin] = visited_marker
+
+    # Use an explicit stack of (vertex, remaining destinations) frames in place of
+    # recursion so that long paths can't exhaust Python's recursion limit. Each
+    # frame resumes its destination iterator exactly where the recursive version
+    # would have returned to
+    stack = [(origin, iter(edges[origin]))]
+    while stack:
+      vertex, destinations = stack[-1]
+      for destination in destinations:
+        if states[destination] != visited_marker:
+          if pre_order:
+            yield destination, PRE_ORDER
+          states[destination] = visited_marker
+
+          # Leaves are finished on the spot rather than paying for a stack frame
+          next_destinations = edges[destination]
+          if not len(next_destinations):
+            if post_order:
+              yield destination, POST_ORDER
+            continue
+          stack.append((destination, iter(next_destinations)))
+          break
+      else:
+        stack.pop()
+        if post_order:
+          yield vertex, POST_ORDER
+
+  def __traverse_depth_first_instrumented(self, visited, origin, pre_order, post_order, stats):
+    # A copy of __traverse_depth_first which also counts vertices, edges and stack
+    # depth, and times itself while excluding the time the consumer holds each event
+    edges = self.edges
+    states, visited_marker = visited.states, visited.visited_marker
+    PRE_ORDER, POST_ORDER = TraversalOrder.PRE_ORDER, TraversalOrder.POST_ORDER
+    started = perf_counter()
+
+    # Vertices are counted before they're yielded, so a consumer which stops early has
+    # every vertex it received counted
+    stats.vertices_visited += 1
+    stats.max_stack_depth = max(stats.max_stack_depth, 1)
+    if pre_order:
+      stats.traversal_seconds += perf_counter() - started
+      yield origin, PRE_ORDER
+      started = perf_counter()
+    states[origin] = visited_marker
+
+    stack = [(origin, iter(edges[origin]))]
+    while stack:
+      vertex, destinations = stack[-1]
+      for destination in destinations:
+        stats.edges_relaxed += 1
+        if states[destination] != visited_marker:
+          stats.vertices_visited += 1
+          if len(stack) + 1 > stats.max_stack_depth:
+            stats.max_stack_depth = len(stack) + 1
+          if pre_order:
+            stats.traversal_seconds += perf_counter() - started
+            yield destination, PRE_ORDER
+            started = perf_counter()
+          states[destination] = visited_marker
+
+          next_destinations = edges[destination]
+          if not len(next_destinations):
+            if post_order:
+              stats.traversal_seconds += perf_counter() - started
+              yield destination, POST_ORDER
+              started = perf_counter()
+            continue
+          stack.append((destination, iter(next_destinations)))
+          break
+      else:
+        stack.pop()
+        if post_order:
+          stats.traversal_seconds += perf_counter() - started
+          yield vertex, POST_ORDER
+          started = perf_counter()
+
+    stats.traversal_seconds += perf_counter() - started
+
+  def apply_breadth_first(self, call_back, sources=(0,), direction_optimizing=False):
+    '''
+    Applies the call back to every vertex reachable from any of the sources in breadth
+    first order. The call back receives (node, edges, distances, distance), where
+    distance is the node's hop count from the nearest source.
+
+    O(v+e) time | O(v) space
+    '''
+    self.__set_call_back(call_back)
+    call_back, edges = self.call_back, self.edges
+    distances = self.__new_distances()
+    if self.sink is None:
+      for distance, frontier in self.__iter_frontiers(sources, direction_optimizing, distances):
+        for vertex in frontier:
+          call_back(vertex, edges, distances, distance)
       return
 
-    self.call_back(origin, self.edges, self.visited, TraversalOrder.PRE_ORDER)
-    
-    self.visited[origin] = True
-    for destination in self.edges[origin]:
-      self.__traverse_depth_first(destination)
-    
-    self.call_back(origin, self.edges, self.visited, TraversalOrder.POST_ORDER)
+    stats = TraversalStats(TraversalKind.BREADTH_FIRST)
+    for distance, frontier in self.__iter_frontiers(sources, direction_optimizing, distances, stats):
+      started = perf_counter()
+      for vertex in frontier:
+        call_back(vertex, edges, distances, distance)
+      stats.callback_seconds += perf_counter() - started
+    self.__record(stats)
+
+  def iter_breadth_first(self, sources=(0,), direction_optimizing=False):
+    '''
+    Lazily yields a (vertex, distance) pair for every vertex reachable from any of the
+    sources, one whole level (frontier) at a time
+    '''
+    stats = None if self.sink is None else TraversalStats(TraversalKind.BREADTH_FIRST)
+    frontiers = self.__iter_frontiers(sources, direction_optimizing, self.__new_distances(), stats)
+    if stats is not None:
+      frontiers = self.__iter_recorded(frontiers, stats)
+    for distance, frontier in frontiers:
+      for vertex in frontier:
+        yield vertex, distance
+
+  def bfs_levels(self, sources=(0,), direction_optimizing=False):
+    '''
+    Returns the hop distance of every vertex from the nearest of the sources as an
+    array indexed by vertex, with -1 marking vertices that can't be reached.
+
+    Runs level-synchronously: each step expands the whole frontier at once. With
+    direction_optimizing set, steps with a large frontier are run bottom-up (every
+    unreached vertex looks for a parent in the frontier), which skips most edge checks
+    on low diameter graphs.
+
+    O(v+e) time | O(v) space
+    '''
+    stats = None if self.sink is None else TraversalStats(TraversalKind.BREADTH_FIRST)
+    distances = self.__new_distances()
+    for _ in self.__iter_frontiers(sources, direction_optimizing, distances, stats):
+      pass
+    if stats is not None:
+      self.__record(stats)
+    return distances
+
+  def __new_distances(self):
+    # Each traversal fills its own distances, so traversals can be interleaved
+    return array('q', [-1]) * len(self.edges)
+
+  def __iter_frontiers(self, sources, direction_optimizing, distances, stats=None):
+    # Instrumentation works a whole frontier at a time, so it stays out of the per-edge
+    # loops of the step functions
+    started = perf_counter()
+    edges = self.edges
+    num_vertices = len(edges)
+
+    frontier = []
+    for source in sources:
+      if not 0 <= source < num_vertices:
+        raise IndexError(f"Vertex '{source}' is not a valid vertex")
+      if distances[source] < 0:
+        distances[source] = 0
+        frontier.append(source)
+
+    if direction_optimizing:
+      predecessors = self.__get_predecessors()
+      # Out edges not yet explored, and vertices not yet reached, for the heuristic
+      unexplored_edges = predecessors.num_edges() - sum(len(edges[vertex]) for vertex in frontier)
+      unreached = None
+
+    distance, bottom_up = 0, False
+    while frontier:
+      if stats is not None:
+        stats.vertices_visited += len(frontier)
+        stats.edges_relaxed += sum(len(edges[vertex]) for vertex in frontier)
+        stats.max_frontier_size = max(stats.max_frontier_size, len(frontier))
+        stats.traversal_seconds += perf_counter() - started
+      yield distance, frontier
+      started = perf_counter()
+      distance += 1
+
+      if direction_optimizing:
+        if bottom_up:
+          bottom_up = len(frontier) * self.BETA >= num_vertices
+        else:
+          frontier_edges = sum(len(edges[vertex]) for vertex in frontier)
+          bottom_up = frontier_edges * self.ALPHA > unexplored_edges
+
+      if bottom_up:
+        if unreached is None:
+          unreached = [vertex for vertex in range(num_vertices) if distances[vertex] < 0]
+        frontier, unreached = self.__step_bottom_up(distances, unreached, distance, predecessors)
+      else:
+        frontier = self.__step_top_down(distances, frontier, distance)
+        unreached = None
+
+      if direction_optimizing:
+        unexplored_edges -= sum(len(edges[vertex]) for vertex in frontier)
+
+    if stats is not None:
+      stats.traversal_seconds += perf_counter() - started
+
+  def __step_top_down(self, distances, frontier, distance):
+    edges = self.edges
+    next_frontier = []
+    for vertex in frontier:
+      for destination in edges[vertex]:
+        if distances[destination] < 0:
+          distances[destination] = distance
+          next_frontier.append(destination)
+    return next_frontier
+
+  def __step_bottom_up(self, distances, unreached, distance, predecessors):
+    offsets, targets = predecessors.offsets, predecessors.targets
+    parent_distance = distance - 1
+    next_frontier, still_unreached = [], []
+    for vertex in unreached:
+      for index in range(offsets[vertex], offsets[vertex + 1]):
+        if distances[targets[index]] == parent_distance:
+          distances[vertex] = distance
+          next_frontier.append(vertex)
+          break
+      else:
+        still_unreached.append(vertex)
+    return next_frontier, still_unreached
+
+  def __get_predecessors(self):
+    # The reversed graph is only needed for bottom-up steps, so build it on first use.
+    # It's kept for later traversals only when the graph is immutable (CSR) or
+    # versioned (a DynamicAdjacencyList logs every change). Any other graph may have
+    # been edited in place since, so its reversed graph is rebuilt every time
+    version = self.__graph_version()
+    if version is not None and self.predecessors is not None and self.predecessors_version == version:
+      return self.predecessors
+
+    edges = self.edges
+    if not isinstance(edges, CompressedAdjacencyList):
+      edges = CompressedAdjacencyList.from_adjacency_list(edges)
+    predecessors = edges.transpose()
+    if version is not None:
+      self.predecessors, self.predecessors_version = predecessors, version
+    return predecessors
+
+  def __graph_version(self):
+    edges = self.edges
+    if hasattr(edges, 'changes'):
+      # Vertices are added without a change being logged
+      return len(edges), len(edges.changes)
+    if isinstance(edges, CompressedAdjacencyList):
+      return len(edges)
+    return None
+
+# Test cases
+# A path longer than the recursion limit is traversed without overflowing the stack
+_chain_length = sys.getrecursionlimit() + 100
+_chain = GraphTraverser([[vertex + 1] for vertex in range(_chain_length - 1)] + [[]])
+assert list(_chain.iter_preorder()) == list(range(_chain_length))
+assert list(_chain.iter_postorder()) == list(range(_chain_length - 1, -1, -1))
+
+# Every component is visited, each PRE_ORDER call back seeing its vertex unvisited
+_events = []
+def _record_event(vertex, edges, visited, order):
+  assert visited[vertex] == (order == TraversalOrder.POST_ORDER)
+  _events.append((vertex, order.name))
+GraphTraverser([[1], [], [], [2]]).apply_depth_first(_record_event)
+assert _events == [
+  (0, 'PRE_ORDER'), (1, 'PRE_ORDER'), (1, 'POST_ORDER'), (0, 'POST_ORDER'),
+  (2, 'PRE_ORDER'), (2, 'POST_ORDER'), (3, 'PRE_ORDER'), (3, 'POST_ORDER'),
+]
+
+# Interleaved traversals each keep their own visited marks, whether a second one is
+# started while a generator is suspended or from inside a call back
+_cycle = GraphTraverser([[1], [2], [0]])
+_first = _cycle.iter_preorder()
+assert [next(_first), next(_first)] == [0, 1]
+assert list(_cycle.iter_preorder()) == [0, 1, 2]
+assert list(_first) == [2]
+_nested = []
+_cycle.apply_depth_first(lambda vertex, edges, visited, order: _nested.append(list(_cycle.iter_postorder())))
+assert len(_nested) == 6 and all(orders == [2, 1, 0] for orders in _nested)
+assert list(_cycle.iter_preorder()) == [0, 1, 2] and not _cycle.visited_in_use
+
+# A breadth first search started while another is suspended doesn't disturb it
+_path = GraphTraverser([[1], [2], [3], []])
+_levels = _path.iter_breadth_first([0])
+assert next(_levels) == (0, 0)
+assert list(_path.bfs_levels([2])) == [-1, -1, 0, 1]
+assert list(_levels) == [(1, 1), (2, 2), (3, 3)]
+
+# The reversed graph of a plain adjacency list is rebuilt for every traversal, as it
+# may have been edited in place
+_edges = [[1], [], []]
+_traverser = GraphTraverser(_edges)
+assert list(_traverser.bfs_levels([0], True)) == [0, 1, -1]
+_edges[0][0] = 2
+assert list(_traverser.bfs_levels([0], True)) == list(_traverser.bfs_levels([0])) == [0, -1, 1]
+
+# Instrumentation counts on the demo graph: a depth first traversal reaches all 5
+# vertices over all 6 edges, with the path 0 -> 1 -> 4 -> 2 the deepest
+def _counts(stats):
+  return stats.kind, stats.vertices_visited, stats.edges_relaxed, stats.max_stack_depth, stats.max_frontier_size
+
+_histogram = HistogramSink()
+_traverser = GraphTraverser([[1, 2], [3, 4], [], [0], [2]], _histogram)
+_traverser.apply_depth_first(lambda vertex, edges, visited, order: None)
+assert _counts(_traverser.last_stats) == (TraversalKind.DEPTH_FIRST, 5, 6, 4, 0)
+assert list(_traverser.iter_postorder()) == [3, 2, 4, 1, 0]
+assert _counts(_traverser.last_stats) == (TraversalKind.DEPTH_FIRST, 5, 6, 4, 0)
+_traverser.bfs_levels()
+assert _counts(_traverser.last_stats) == (TraversalKind.BREADTH_FIRST, 5, 6, 0, 2)
+assert _histogram.values['vertices_visited'] == [5, 5, 5] and _histogram.values['edges_relaxed'] == [6, 6, 6]
+assert _histogram.summary('max_stack_depth') == { 'count': 3, 'min': 0, 'max': 4, 'mean': 8 / 3, 'p50': 4, 'p99': 4 }
+assert _histogram.summary('unknown') == { 'count': 0 }
+
+# A generator closed early still records what it covered, counting every vertex the
+# consumer received
+_stream, _histogram = StringIO(), HistogramSink()
+for _sink in (JsonSink(_stream), _histogram):
+  _preorder = GraphTraverser([[1, 2], [3, 4], [], [0], [2]], _sink).iter_preorder()
+  assert next(_preorder) == 0 and next(_preorder) == 1
+  _preorder.close()
+_lines = _stream.getvalue().splitlines()
+assert len(_lines) == 1 and _lines[0].startswith(
+  '{"kind": "depth_first", "vertices_visited": 2, "edges_relaxed": 1, "max_stack_depth": 2, "max_frontier_size": 0,'
+)
+assert _histogram.values['vertices_visited'] == [2] and _histogram.values['max_stack_depth'] == [2]
+_frontiers = GraphTraverser([[1, 2], [3, 4], [], [0], [2]], _histogram).iter_breadth_first([0])
+assert next(_frontiers) == (0, 0)
+_frontiers.close()
+assert _histogram.values['vertices_visited'] == [2, 1] and _histogram.values['max_frontier_size'] == [0, 1]
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+
+import heapq
+from classes.compressed_adjacency_list import CompressedAdjacencyList
+
+INFINITY = float('inf')
+
+class ShortestPathFinder:
+  '''
+  Answers weighted shortest path queries over a weighted `CompressedAdjacencyList`
+  with non-negative edge weights. The reversed graph needed by bidirectional search
+  is built once per finder, so a finder should be reused across queries.
+
+  Every search keeps its distances in dictionaries holding only the vertices it
+  touched, so a point-to-point query costs time proportional to the region it
+  explores rather than to the size of the graph.
+  '''
+  def __init__(self, graph):
+    if not isinstance(graph, CompressedAdjacencyList) or not graph.is_weighted():
+      raise TypeError("Constructor arg 'graph' must be a weighted CompressedAdjacencyList")
+    if any(weight < 0 for weight in graph.weights):
+      raise Exception("Constructor arg 'graph' cannot contain negative edge weights")
+    self.graph = graph
+    self.reverse_graph = None
+
+  def distances_from(self, source, targets=None):
+    '''
+    Runs Dijkstra's algorithm from the source and returns a dictionary mapping every
+    reached vertex to its distance. When targets are given, the search stops as soon
+    as all of them are settled and only the settled vertices are returned.
+
+    O((v+e)*log(v)) time | O(v) space
+    '''
+    self.__check_vertex(source)
+    search = self.__dijkstra(self.graph, source, targets)
+    if targets is None:
+      return search.distances
+    return { vertex: search.distances[vertex] for vertex in search.settled }
+
+  def shortest_path(self, source, target):
+    '''
+    Returns (distance, path) for the shortest path from source to target, where path
+    lists the vertices from source to target inclusive, or (inf, []) if the target
+    can't be reached. Searches forward from the source and backward from the target
+    at the same time, which roughly halves the radius each search has to cover.
+
+    O((v+e)*log(v)) time | O(v) space
+    '''
+    self.__check_vertex(source)
+    self.__check_vertex(target)
+    if source == target:
+      return 0.0, [source]
+
+    if self.reverse_graph is None:
+      self.reverse_graph = self.graph.transpose()
+
+    searches = (_Search(self.graph, source), _Search(self.reverse_graph, target))
+    best, meeting = INFINITY, None
+
+    # Stop once the two nearest unsettled vertices can't improve on the best path found
+    while searches[0].heap and searches[1].heap:
+      if searches[0].heap[0][0] + searches[1].heap[0][0] >= best:
+        break
+
+      # Expand the side with the smaller frontier
+      search, other = searches if len(searches[0].heap) <= len(searches[1].heap) else searches[::-1]
+      for vertex in search.step():
+        if vertex in other.distances:
+          length = search.distances[vertex] + other.distances[vertex]
+          if length < best:
+            best, meeting = length, vertex
+
+    if meeting is None:
+      return INFINITY, []
+    forward_path = searches[0].path_to(meeting)
+    backward_path = searches[1].path_to(meeting)
+    return best, forward_path + backward_path[-2::-1]
+
+  def distance_matrix(self, sources, targets):
+    '''
+    Returns a list of rows, one per source, holding the distance to each target (inf
+    where unreachable). Runs one search per source that stops once every target has
+    been settled.
+
+    O(s*(v+e)*log(v)) time | O(v+s*t) space
+    '''
+    for vertex in list(sources) + list(targets):
+      self.__check_vertex(vertex)
+
+    matrix = []
+    for source in sources:
+      distances = self.__dijkstra(self.graph, source, targets).distances
+      matrix.append([distances.get(target, INFINITY) for target in targets])
+    return matrix
+
+  def __dijkstra(self, graph, source, targets):
+    search = _Search(graph, source)
+    remaining = None if targets is None else set(targets)
+    while search.heap:
+      touched = search.step()
+      if touched and remaining is not None:
+        remaining.discard(touched[0])
+        if not remaining:
+          break
+    return search
+
+  def __check_vertex(self, vertex):
+    if not vertex in self.graph:
+      raise IndexError(f"Vertex '{vertex}' is not a valid vertex")
+
+class _Search:
+  '''
+  The state of a single Dijkstra search: a binary heap of (distance, vertex) entries
+  with lazy deletion of stale entries, tentative distances and the parent of every
+  reached vertex
+  '''
+  def __init__(self, graph, source):
+    self.offsets, self.targets, self.weights = graph.offsets, graph.targets, graph.weights
+    self.heap = [(0.0, source)]
+    self.distances = { source: 0.0 }
+    self.parents = { source: None }
+    self.settled = set()
+
+  def step(self):
+    '''
+    Settles the nearest unsettled vertex and relaxes its out edges. Returns the settled
+    vertex followed by every vertex whose distance improved, or an empty list if the
+    popped heap entry was stale.
+    '''
+    distance, vertex = heapq.heappop(self.heap)
+    if vertex in self.settled:
+      return []
+    self.settled.add(vertex)
+    touched = [vertex]
+
+    distances, parents, targets, weights = self.distances, self.parents, self.targets, self.weights
+    for index in range(self.offsets[vertex], self.offsets[vertex + 1]):
+      destination = targets[index]
+      candidate = distance + weights[index]
+      if candidate < distances.get(destination, INFINITY):
+        distances[destination] = candidate
+        parents[destination] = vertex
+        heapq.heappush(self.heap, (candidate, destination))
+        touched.append(destination)
+    return touched
+
+  def path_to(self, vertex):
+    path = []
+    while vertex is not None:
+      path.append(vertex)
+      vertex = self.parents[vertex]
+    return path[::-1]
+
+# Test cases
+_graph = CompressedAdjacencyList.from_edge_list(5, [
+  (0, 1, 4.0), (0, 2, 1.0), (2, 1, 2.0), (1, 3, 1.0), (2, 3, 5.0), (3, 0, 1.0)
+])
+_finder = ShortestPathFinder(_graph)
+assert _finder.distances_from(0) == { 0: 0.0, 1: 3.0, 2: 1.0, 3: 4.0 }
+assert _finder.shortest_path(0, 3) == (4.0, [0, 2, 1, 3])
+assert _finder.shortest_path(3, 2) == (2.0, [3, 0, 2])
+assert _finder.shortest_path(0, 4) == (INFINITY, [])
+assert _finder.distance_matrix([0, 1], [3, 4]) == [[4.0, INFINITY], [1.0, INFINITY]]
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+
+import json
+import logging
+from enum import Enum
+
+class TraversalKind(Enum):
+  DEPTH_FIRST = 'depth_first'
+  BREADTH_FIRST = 'breadth_first'
+
+class TraversalStats:
+  '''
+  Counters collected by an instrumented `GraphTraverser` over a single traversal.
+  Time spent in the traversal machinery and time spent inside user call backs are
+  tracked separately, so a slow traversal can be attributed to one or the other.
+  '''
+  def __init__(self, kind):
+    self.kind = kind
+    self.vertices_visited = 0
+    self.edges_relaxed = 0
+    self.max_stack_depth = 0
+    self.max_frontier_size = 0
+    self.traversal_seconds = 0.0
+    self.callback_seconds = 0.0
+
+  def as_dict(self):
+    return {
+      'kind': self.kind.value,
+      'vertices_visited': self.vertices_visited,
+      'edges_relaxed': self.edges_relaxed,
+      'max_stack_depth': self.max_stack_depth,
+      'max_frontier_size': self.max_frontier_size,
+      'traversal_seconds': self.traversal_seconds,
+      'callback_seconds': self.callback_seconds,
+    }
+
+# Sinks receive the stats of every completed (or abandoned) traversal through their
+# `record(stats)` method. Any object with that method can be used as a sink
+
+class LoggingSink:
+  '''
+  Logs one line per traversal
+  '''
+  def __init__(self, logger=None, level=logging.INFO):
+    self.logger = logger or logging.getLogger('graphs.traversal')
+    self.level = level
+
+  def record(self, stats):
+    self.logger.log(
+      self.level,
+      '%s traversal: %d vertices, %d edges, max depth %d, %.6fs traversal, %.6fs call backs',
+      stats.kind.value, stats.vertices_visited, stats.edges_relaxed, stats.max_stack_depth,
+      stats.traversal_seconds, stats.callback_seconds
+    )
+
+class HistogramSink:
+  '''
+  Keeps every recorded value of every counter in memory so distributions across many
+  traversals can be summarised
+  '''
+  def __init__(self):
+    self.values = {}
+
+  def record(self, stats):
+    for name, value in stats.as_dict().items():
+      if name != 'kind':
+        self.values.setdefault(name, []).append(value)
+
+  def summary(self, name):
+    '''
+    Returns the count, min, max, mean, median (p50) and p99 of the named counter
+    '''
+    values = sorted(self.values.get(name, []))
+    if not values:
+      return { 'count': 0 }
+    percentile = lambda fraction: values[min(len(values) - 1, int(fraction * len(values)))]
+    return {
+      'count': len(values),
+      'min': values[0],
+      'max': values[-1],
+      'mean': sum(values) / len(values),
+      'p50': percentile(0.5),
+      'p99': percentile(0.99),
+    }
+
+class JsonSink:
+  '''
+  Writes one JSON object per traversal (JSON lines) to a writable text stream
+  '''
+  def __init__(self, stream):
+    self.stream = stream
+
+  def record(self, stats):
+    self.stream.write(json.dumps(stats.as_dict()) + '\n')
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+
+import os
+
+class VisitedStates:
+  '''
+  Compact Unvisited/InProgress/Visited tracking for the vertices 0..n-1 of a graph,
+  stored as a single byte per vertex instead of a Python object per vertex.
+
+  Every byte holds a generation stamp. A vertex is InProgress if its byte equals
+  `in_progress_marker`, Visited if it equals `visited_marker`, and Unvisited for any
+  older stamp. Resetting only advances the markers, so repeated traversals reuse the
+  same buffer in O(1) time (the buffer is wiped once every 127 resets, when the
+  stamps would overflow a byte).
+
+  O(v) space (one byte per vertex)
+  '''
+  MAX_GENERATION = 252
+
+  def __init__(self, size):
+    self.states = bytearray(size)
+    self.__set_generation(0)
+
+  def __set_generation(self, generation):
+    self.generation = generation
+    self.in_progress_marker = generation + 1
+    self.visited_marker = generation + 2
+
+  def reset(self):
+    if self.generation >= self.MAX_GENERATION:
+      self.states[:] = bytes(len(self.states))
+      self.__set_generation(0)
+    else:
+      self.__set_generation(self.generation + 2)
+
+  def __len__(self):
+    return len(self.states)
+
+  def __getitem__(self, vertex):
+    return self.states[vertex] == self.visited_marker
+
+  def __setitem__(self, vertex, visited):
+    self.states[vertex] = self.visited_marker if visited else self.generation
+
+  def is_unvisited(self, vertex):
+    return self.states[vertex] <= self.generation
+
+  def is_in_progress(self, vertex):
+    return self.states[vertex] == self.in_progress_marker
+
+  def is_visited(self, vertex):
+    return self.states[vertex] == self.visited_marker
+
+  def mark_in_progress(self, vertex):
+    self.states[vertex] = self.in_progress_marker
+
+  def mark_visited(self, vertex):
+    self.states[vertex] = self.visited_marker
+
+# Test cases
+_states = VisitedStates(3)
+_states.mark_in_progress(0)
+_states.mark_visited(1)
+assert _states.is_in_progress(0) and _states[1] and _states.is_unvisited(2)
+for _ in range(1000):
+  _states.reset()
+  assert all(_states.is_unvisited(vertex) for vertex in range(3))
+  _states[2] = True
+  assert _states.is_visited(2) and not _states[0]
+
+# graphs/classes and problems/sorting/classes are separate script roots, so each holds
+# its own copy of this module. Both copies must stay identical
+_root = os.path.dirname(os.path.abspath(__file__))
+while not os.path.isdir(os.path.join(_root, 'graphs')) and os.path.dirname(_root) != _root:
+  _root = os.path.dirname(_root)
+_copies = [
+  os.path.join(_root, *parts, 'visited_states.py')
+  for parts in (('graphs', 'classes'), ('problems', 'sorting', 'classes'))
+]
+if all(os.path.isfile(copy) for copy in _copies):
+  _contents = []
+  for _copy in _copies:
+    with open(_copy, 'rb') as file:
+      _contents.append(file.read())
+  assert _contents[0] == _contents[1], 'graphs/classes/visited_states.py and problems/sorting/classes/visited_states.py differ'
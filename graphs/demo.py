@@ -23,4 +23,11 @@ def call_back(node, edges, visited, order):
     print(f'[POST_ORDER] Executed callback for node: {node}')
 
 # Call the traverser to demo the call back
-traverser.apply_depth_first(call_back)
\ No newline at end of file
+traverser.apply_depth_first(call_back)
+
+# The same traversal is also available lazily as a stream of vertices
+print(f'Pre-order: {list(traverser.iter_preorder())}')
+print(f'Post-order: {list(traverser.iter_postorder())}')
+
+# Breadth first hop distances from vertex 0 (-1 marks unreachable vertices)
+print(f'BFS levels: {list(traverser.bfs_levels())}')
@@ -1,15 +1,23 @@
 
-def partition_point(arr, predicate):
+def partition_point(arr, predicate, lo=0, hi=None):
   '''
-  Takes a list of values and partitions the list such that all the 
+  Takes a list of values and partitions the list such that all the
   values satisfying the predicate condition are on the left of the
   array, and all the values not satisfying the predicate condition
   are on the right of the array.
 
-  Function returns the index where values become False according to 
+  Function returns the index where values become False according to
   the predicate.
+
+  Works over any sequence supporting len() and indexing (a list, tuple,
+  memoryview, mmap, array...). The search can be restricted to arr[lo:hi],
+  in which case the returned index lies in [lo, hi].
+   - O(log(n)) time | O(1) space, with one predicate call per probe
   '''
-  lo, hi = 0, len(arr)
+  if hi is None:
+    hi = len(arr)
+  if lo < 0 or hi > len(arr) or lo > hi:
+    _check_bounds(arr, lo, hi)
   while lo < hi:
     mid = (lo + hi) // 2
     if predicate(mid, arr[mid], arr):
@@ -18,4 +26,117 @@ def partition_point(arr, predicate):
       hi = mid
   return lo
 
-print(partition_point([0, 0, 1, 1, 1, 1], lambda index, val, arr: val == 0))
\ No newline at end of file
+def gallop_partition_point(arr, predicate, hint, lo=0, hi=None):
+  '''
+  Finds the same partition point as `partition_point`, searching outwards from a
+  hint: probes at distances 1, 2, 4, 8... from the hint bracket the partition point,
+  then a binary search finishes within the bracket. When the answer lies d positions
+  from the hint this costs O(log(d)) probes rather than O(log(n)), which pays off for
+  workloads where successive queries land close together.
+   - O(log(d)) time | O(1) space
+  '''
+  lo, hi = _check_bounds(arr, lo, hi)
+  if lo == hi:
+    return lo
+  hint = min(max(hint, lo), hi - 1)
+
+  if predicate(hint, arr[hint], arr):
+    # The partition point is to the right of the hint. Gallop right until a probe
+    # fails, at which point it lies between the last two probes
+    last_true, step = hint, 1
+    while last_true + step < hi:
+      probe = last_true + step
+      if not predicate(probe, arr[probe], arr):
+        return partition_point(arr, predicate, last_true + 1, probe)
+      last_true, step = probe, step * 2
+    return partition_point(arr, predicate, last_true + 1, hi)
+
+  # Otherwise it's at or to the left of the hint, so gallop left
+  first_false, step = hint, 1
+  while first_false - step >= lo:
+    probe = first_false - step
+    if predicate(probe, arr[probe], arr):
+      return partition_point(arr, predicate, probe + 1, first_false)
+    first_false, step = probe, step * 2
+  return partition_point(arr, predicate, lo, first_false)
+
+def batched_partition_point(arr, predicate, lo=0, hi=None, fanout=16):
+  '''
+  Finds the same partition point as `partition_point`, with a predicate which takes a
+  list of indices and returns a sequence of booleans, one per index (e.g. a NumPy
+  boolean array). Each round probes fanout-1 evenly spaced indices with a single
+  predicate call, narrowing the window by a factor of `fanout` rather than 2, so a
+  predicate with a high fixed cost per call (a vectorized computation, a remote
+  lookup) is called O(log(n)/log(fanout)) times rather than O(log(n)).
+   - O(fanout*log(n)/log(fanout)) time | O(fanout) space
+  '''
+  if fanout < 2:
+    raise ValueError('fanout must be at least 2')
+  lo, hi = _check_bounds(arr, lo, hi)
+  while lo < hi:
+    size = hi - lo
+    if size < fanout:
+      probes = list(range(lo, hi))
+    else:
+      probes = [lo + (step * size) // fanout for step in range(1, fanout)]
+
+    # The flags are True then False, so the number of Trues locates the boundary
+    passed = sum(map(bool, predicate(probes)))
+    if passed:
+      lo = probes[passed - 1] + 1
+    if passed < len(probes):
+      hi = probes[passed]
+  return lo
+
+def lower_bound(arr, target, lo=0, hi=None, key=None):
+  '''
+  Returns the index of the first value in the sorted arr[lo:hi] which is not less
+  than the target (comparing key(value) if a key function is given)
+  '''
+  if key is None:
+    return partition_point(arr, lambda index, value, arr: value < target, lo, hi)
+  return partition_point(arr, lambda index, value, arr: key(value) < target, lo, hi)
+
+def upper_bound(arr, target, lo=0, hi=None, key=None):
+  '''
+  Returns the index of the first value in the sorted arr[lo:hi] which is greater than
+  the target (comparing key(value) if a key function is given)
+  '''
+  if key is None:
+    return partition_point(arr, lambda index, value, arr: not target < value, lo, hi)
+  return partition_point(arr, lambda index, value, arr: not target < key(value), lo, hi)
+
+def _check_bounds(arr, lo, hi):
+  hi = len(arr) if hi is None else hi
+  if lo < 0 or hi > len(arr) or lo > hi:
+    raise ValueError(f'Invalid search window [{lo}, {hi}) for a sequence of length {len(arr)}')
+  return lo, hi
+
+print(partition_point([0, 0, 1, 1, 1, 1], lambda index, val, arr: val == 0))
+
+# Test cases
+_values = [0, 0, 1, 1, 1, 1]
+assert partition_point(_values, lambda index, val, arr: val == 0) == 2
+assert partition_point(_values, lambda index, val, arr: val == 0, 3) == 3
+assert partition_point(memoryview(bytes(_values)), lambda index, val, arr: val == 0) == 2
+
+_sorted = [1, 3, 3, 3, 5, 8, 13]
+assert lower_bound(_sorted, 3) == 1 and upper_bound(_sorted, 3) == 4
+assert lower_bound(_sorted, 0) == 0 and upper_bound(_sorted, 13) == 7
+assert lower_bound(_sorted, 4, lo=2, hi=5) == 4
+assert lower_bound(['b', 'aa', 'ccc'], 2, key=len) == 1
+
+for _length in range(12):
+  _values = list(range(_length))
+  for _split in range(_length + 1):
+    _predicate = lambda index, val, arr: val < _split
+    for _hint in range(-1, _length + 1):
+      assert gallop_partition_point(_values, _predicate, _hint) == _split
+    for _fanout in (2, 3, 16):
+      assert batched_partition_point(_values, lambda indices: [_values[index] < _split for index in indices], fanout=_fanout) == _split
+
+try:
+  partition_point([1, 2], lambda index, val, arr: True, 0, 3)
+  assert False
+except ValueError:
+  pass
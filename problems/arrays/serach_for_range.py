@@ -1,4 +1,7 @@
+from bisect import bisect_left, bisect_right
 from enum import Enum, auto
+from itertools import islice
+from operator import le
 
 def search_for_range(array, target):
   '''
@@ -6,7 +9,13 @@ def search_for_range(array, target):
   index range within which the target is contained.
 
   Runs in O(log(n)) time | O(1) space
+
+  Arrays which provide their own `bisect_left` and `bisect_right` (such as a
+  `SortedArray`) are searched with them.
   '''
+  if hasattr(array, 'bisect_left') and hasattr(array, 'bisect_right'):
+    lower, upper = array.bisect_left(target), array.bisect_right(target)
+    return (lower, upper - 1) if lower < upper else (-1, -1)
   return RangeFinder(array, target).target_range()
 
 class RangeFinder():
@@ -62,6 +71,99 @@ class RangeFinder():
     if direction != self.SearchDirection.Left and direction != self.SearchDirection.Right:
       raise Exception(f'Invalid search direction: {direction}')
 
+class RangeIndex():
+  '''
+  A reusable index over a sorted array for answering many range queries against the
+  same data. Each query is one or two C level bisects rather than a fresh RangeFinder,
+  and batches of queries are answered in sorted order so each bisect starts where the
+  previous one ended.
+
+  With `compress`, runs of equal values are stored once along with the index where
+  each run starts, so arrays dominated by long duplicate runs are searched (and held)
+  in time and space proportional to their number of distinct values.
+
+  Construction: O(n) time | O(n) space, or O(d) space for d distinct values when
+  compressed. Each query: O(log(n)) time | O(1) space
+  '''
+  def __init__(self, array, compress=False):
+    if not all(map(le, array, islice(array, 1, None))):
+      raise Exception('Input <array> is not in sorted order')
+
+    self.length = len(array)
+    self.run_starts = None
+    if not compress:
+      self.values = array
+      return
+
+    # run_starts[i] is the index of the first element of the i-th run, with a final
+    # entry of len(array) so that every run ends where the next one starts
+    self.values, self.run_starts = [], []
+    for index, value in enumerate(array):
+      if not self.values or self.values[-1] != value:
+        self.values.append(value)
+        self.run_starts.append(index)
+    self.run_starts.append(self.length)
+
+  def __len__(self):
+    return self.length
+
+  def lower_bound(self, target):
+    '''
+    Returns the index of the first element not less than the target
+    '''
+    return self.__to_index(bisect_left(self.values, target))
+
+  def upper_bound(self, target):
+    '''
+    Returns the index of the first element greater than the target
+    '''
+    return self.__to_index(bisect_right(self.values, target))
+
+  def equal_range(self, target):
+    '''
+    Returns the (first, last) indices holding the target, or (-1, -1) if it's not in
+    the array, matching `search_for_range`
+    '''
+    return _as_range(self.lower_bound(target), self.upper_bound(target))
+
+  def count_in_range(self, low, high):
+    '''
+    Returns how many elements lie in the closed interval [low, high]
+    '''
+    return max(0, self.upper_bound(high) - self.lower_bound(low))
+
+  def lower_bounds(self, targets):
+    return self.__bounds(targets, bisect_left)
+
+  def upper_bounds(self, targets):
+    return self.__bounds(targets, bisect_right)
+
+  def equal_range_many(self, targets):
+    '''
+    Returns the equal_range of every target
+    '''
+    return list(map(_as_range, self.lower_bounds(targets), self.upper_bounds(targets)))
+
+  def count_in_range_many(self, ranges):
+    '''
+    Returns the count_in_range of every (low, high) pair
+    '''
+    lows, highs = [low for low, _ in ranges], [high for _, high in ranges]
+    return [max(0, upper - lower) for lower, upper in zip(self.lower_bounds(lows), self.upper_bounds(highs))]
+
+  def __bounds(self, targets, bisect):
+    values, positions, lo = self.values, [0] * len(targets), 0
+    for position in sorted(range(len(targets)), key=targets.__getitem__):
+      lo = bisect(values, targets[position], lo)
+      positions[position] = lo
+    return positions if self.run_starts is None else [self.run_starts[run] for run in positions]
+
+  def __to_index(self, position):
+    return position if self.run_starts is None else self.run_starts[position]
+
+def _as_range(lower, upper):
+  return (lower, upper - 1) if lower < upper else (-1, -1)
+
 # Test cases
 assert search_for_range([5, 7, 7, 8, 8, 10], 5) == (0,0)
 assert search_for_range([5, 7, 7, 8, 8, 10], 7) == (1,2)
@@ -71,4 +173,16 @@ assert search_for_range([5, 7, 7, 8, 8, 10], 9) == (-1,-1)
 assert search_for_range([0, 1, 21, 33, 45, 45, 45, 45, 45, 45, 61, 71, 73], 45) == (4,9)
 assert search_for_range([0, 1, 21, 33, 45, 45, 45, 45, 45, 45, 45, 45, 45], 45) == (4,12)
 assert search_for_range([0, 1, 21, 33, 45, 45, 45, 45, 45, 45, 61, 71, 73], 47) == (-1,-1)
-assert search_for_range([0, 1, 21, 33, 45, 45, 45, 45, 45, 45, 61, 71, 73], -1) == (-1,-1)
\ No newline at end of file
+assert search_for_range([0, 1, 21, 33, 45, 45, 45, 45, 45, 45, 61, 71, 73], -1) == (-1,-1)
+
+_array = [0, 1, 21, 33, 45, 45, 45, 45, 45, 45, 61, 71, 73]
+for _compress in (False, True):
+  _index = RangeIndex(_array, compress=_compress)
+  for _target in (-1, 0, 21, 45, 47, 73, 74):
+    assert _index.equal_range(_target) == search_for_range(_array, _target)
+  assert _index.equal_range_many([47, 45, 0, 73]) == [(-1, -1), (4, 9), (0, 0), (12, 12)]
+  assert _index.count_in_range(20, 61) == 9 and _index.count_in_range(46, 60) == 0
+  assert _index.count_in_range(10, 5) == 0 and _index.count_in_range(-5, 100) == 13
+  assert _index.count_in_range_many([(20, 61), (45, 45), (74, 80)]) == [9, 6, 0]
+  assert RangeIndex([], compress=_compress).equal_range(1) == (-1, -1)
+assert len(RangeIndex([45] * 1000, compress=True).values) == 1
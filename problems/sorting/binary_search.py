@@ -1,4 +1,6 @@
 
+from bisect import bisect_left
+from classes.sorted_array import SortedArray, is_sorted
 from classes.strategy import Strategy
 
 def binary_search(array, target, strategy=Strategy.Iteration, validate_sorted=False):
@@ -9,8 +11,13 @@ def binary_search(array, target, strategy=Strategy.Iteration, validate_sorted=Fa
   Time and Space Complexity by Strategy:
    * Iterative: O(log(n)) time | O(1) space
    * Recursive: O(log(n)) time | O(log(n)) space
+
+  Validating the order is an O(n) scan, except for a `SortedArray`, which is known to
+  be sorted and so is never scanned.
   '''
-  if validate_sorted:
+  if isinstance(array, SortedArray):
+    array = array.values
+  elif validate_sorted:
     if not _array_is_sorted(array):
       raise Exception('Input <array> is not in sorted order')
   
@@ -28,6 +35,37 @@ def binary_search(array, target, strategy=Strategy.Iteration, validate_sorted=Fa
   
   raise KeyError(f'Invalid strategy: {strategy}')  
 
+def binary_search_many(array, targets):
+  '''
+  Looks up every target in one call, returning a list with the index of each target
+  in the array, or -1 where it's not found. Where a target occurs several times its
+  first index is returned.
+
+  The targets are visited in sorted order, so each search only needs to cover the
+  part of the array after the previous target's position, and repeated targets reuse
+  the previous answer.
+   - O(m*log(m) + m*log(n)) time | O(m) space, for m targets
+  '''
+  if isinstance(array, SortedArray):
+    array = array.values
+  if not len(array):
+    return [-1] * len(targets)
+
+  results = [-1] * len(targets)
+  length, lo = len(array), 0
+  previous_target, previous_result = None, -1
+  for position in sorted(range(len(targets)), key=targets.__getitem__):
+    target = targets[position]
+    if target == previous_target:
+      results[position] = previous_result
+      continue
+
+    lo = bisect_left(array, target, lo)
+    previous_target = target
+    previous_result = lo if lo < length and array[lo] == target else -1
+    results[position] = previous_result
+  return results
+
 def _binary_search_iterative(array, target):
   # Create a window from the start index of the array to the last index,
   # keep searching windows of halving size until we find the array or
@@ -77,7 +115,7 @@ def _array_is_sorted(array):
   '''
   An O(n) scan across the array to check if the array is sorted
   '''
-  return all(map(lambda i: array[i-1] <= array[i], range(1,len(array))))
+  return is_sorted(array)
 
 for strategy in Strategy:
   assert binary_search([1,2,3,4,5,6,7], 3, strategy) == 2
@@ -85,4 +123,16 @@ for strategy in Strategy:
   assert binary_search([99, 100, 110, 130, 133], 133, strategy) == 4
   assert binary_search([99, 100, 110, 130, 133], 134, strategy) == -1
   assert binary_search([64, 81, 144, 256, 512], 81, strategy) == 1
-  assert binary_search([64, 81, 144, 256, 512], 420, strategy) == -1
\ No newline at end of file
+  assert binary_search([64, 81, 144, 256, 512], 420, strategy) == -1
+
+assert binary_search_many([1,2,3,4,5,6,7], [8, 3, 1, 3, 0, 7]) == [-1, 2, 0, 2, -1, 6]
+assert binary_search_many([2, 2, 2, 5, 5, 9], [5, 2, 9, 4, 10]) == [3, 0, 5, -1, -1]
+assert binary_search_many([], [1, 2]) == [-1, -1]
+assert binary_search_many([1, 2, 3], []) == []
+assert binary_search_many((1, 3, 5), (5, 2)) == [2, -1]
+
+_sorted = SortedArray([99, 100, 110, 130, 133])
+for strategy in Strategy:
+  assert binary_search(_sorted, 130, strategy, validate_sorted=True) == 3
+  assert binary_search(_sorted, 131, strategy, validate_sorted=True) == -1
+assert binary_search_many(_sorted, [133, 1]) == [4, -1]
@@ -0,0 +1,137 @@
+from bisect import bisect_left
+from classes.sorted_array import is_sorted
+
+class RotatedSortedArray:
+  '''
+  A sorted array which has been rotated (shifted) by an unknown number of indices,
+  such as the contents of a ring buffer. The rotation offset, the index of the
+  smallest value, is found once on construction. Every lookup then knows which of the
+  two sorted segments, [0, offset) and [offset, n), can hold the target and binary
+  searches just that segment, with no per-step checks for the rotation.
+
+  Duplicate values are supported, including values equal to the ones either side of
+  the rotation point.
+
+   * Construction: O(n) time (validating the order) | O(n) space
+   * find: O(log(n)) time | O(1) space
+  '''
+  def __init__(self, values):
+    self.values = list(values)
+    self.offset = _rotation_offset(self.values)
+    if not self.__is_rotated_sorted():
+      raise Exception('Input <array> is not a rotated sorted array')
+
+  def __len__(self):
+    return len(self.values)
+
+  def __getitem__(self, index):
+    '''
+    Returns the value at the index of the unrotated (sorted) view of the array
+    '''
+    length = len(self.values)
+    if not -length <= index < length:
+      raise IndexError(f"Index '{index}' is out of range")
+    return self.values[(index % length + self.offset) % length]
+
+  def __iter__(self):
+    return iter(self.values[self.offset:] + self.values[:self.offset])
+
+  def __contains__(self, value):
+    return self.find(value) != -1
+
+  def find(self, target):
+    '''
+    Returns the index of the target in the (rotated) array, or -1 if it's not there,
+    matching `shifted_binary_search`
+    '''
+    values = self.values
+    if not values:
+      return -1
+    lo, hi = self.__segment_of(target)
+    index = bisect_left(values, target, lo, hi)
+    return index if index < hi and values[index] == target else -1
+
+  def find_many(self, targets):
+    '''
+    Looks up every target in one call, returning the index of each target in the
+    (rotated) array, or -1 where it's not found. The targets are visited in sorted
+    order, so each bisect only covers the part of its segment after the previous
+    target's position.
+     - O(m*log(m) + m*log(n)) time | O(m) space, for m targets
+    '''
+    values, results = self.values, [-1] * len(targets)
+    if not values:
+      return results
+
+    segment, lo, hi = None, 0, 0
+    for position in sorted(range(len(targets)), key=targets.__getitem__):
+      target = targets[position]
+      # Ascending targets move from the segment of smaller values to the other segment
+      # at most once, so only restart the bisect window when the segment changes
+      target_segment = self.__segment_of(target)
+      if target_segment != segment:
+        segment = target_segment
+        lo, hi = segment
+      lo = bisect_left(values, target, lo, hi)
+      if lo < hi and values[lo] == target:
+        results[position] = lo
+    return results
+
+  def __segment_of(self, target):
+    # Every value of [0, offset) is at least values[0], and every value of [offset, n)
+    # at most values[0], so one comparison picks the segment that can hold the target
+    if self.offset and not target < self.values[0]:
+      return 0, self.offset
+    return self.offset, len(self.values)
+
+  def __is_rotated_sorted(self):
+    values, offset = self.values, self.offset
+    if not is_sorted(values[offset:]) or not is_sorted(values[:offset]):
+      return False
+    return offset == 0 or values[-1] <= values[0]
+
+def _rotation_offset(values):
+  '''
+  Binary searches for the index of the smallest value (the start of the sorted
+  order), comparing the middle of the window with its right end. When the two are
+  equal, the window can't be halved (the rotation point may be on either side), so
+  it's shrunk by one from the right, unless the right end is itself the rotation
+  point. Runs in O(log(n)) time, degrading towards O(n) with many duplicates.
+  '''
+  lo, hi = 0, len(values) - 1
+  while lo < hi:
+    mid = (lo + hi) // 2
+    if values[hi] < values[mid]:
+      lo = mid + 1
+    elif values[mid] < values[hi]:
+      hi = mid
+    elif values[hi] < values[hi - 1]:
+      return hi
+    else:
+      hi -= 1
+  return max(lo, 0)
+
+# Test cases
+_array = RotatedSortedArray([999, 1000, 64, 81, 144, 256, 512])
+assert _array.offset == 2 and list(_array) == [64, 81, 144, 256, 512, 999, 1000]
+assert _array[0] == 64 and _array[-1] == 1000
+assert _array.find(81) == 3 and _array.find(999) == 0 and _array.find(420) == -1
+assert _array.find_many([1000, 420, 64, 512, 1]) == [1, -1, 2, 6, -1]
+assert RotatedSortedArray([]).find(1) == -1 and RotatedSortedArray([5]).find(5) == 0
+
+for _sorted in ([1, 1, 1, 2, 3], [1, 2, 2, 2, 2], [0, 0, 0, 0], [1, 1, 2, 2, 3, 3, 3]):
+  for _shift in range(len(_sorted)):
+    _values = _sorted[_shift:] + _sorted[:_shift]
+    _array = RotatedSortedArray(_values)
+    assert list(_array) == _sorted
+    for _target in range(-1, 5):
+      _index = _array.find(_target)
+      assert (_index == -1) if _target not in _values else _values[_index] == _target
+    _targets = list(range(-1, 5))
+    assert _array.find_many(_targets) == [_array.find(_target) for _target in _targets]
+
+try:
+  RotatedSortedArray([3, 1, 2, 0])
+  assert False
+except Exception as error:
+  assert 'rotated sorted' in str(error)
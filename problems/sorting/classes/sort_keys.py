@@ -0,0 +1,70 @@
+from array import array as typed_array
+
+# XORing the bits of a negative double (read as an int64) with this reverses their
+# order, so that every double maps to an int64 with the same ordering
+FLOAT_ORDER_MASK = 0x7FFF_FFFF_FFFF_FFFF
+
+def decorate(array, key, reverse=False):
+  '''
+  Computes key(value) once per element, and pairs every key with the element's index
+  so that sorting the result with any strategy orders the elements by key and breaks
+  ties by index (even an unstable sort keeps equal keys in input order).
+
+  Numeric keys are folded together with their index into a single integer,
+  (key - lowest) * n + index, which compares faster and takes half the memory of a
+  (key, index) tuple. Float keys are first mapped to int64 values with the same
+  order, through an array('d'). For a descending sort the keys are negated, so that
+  equal keys still come out in input order. Any other keys are paired with their
+  index in a tuple, with the index negated for a descending sort.
+  '''
+  keys = list(map(key, array))
+  key_types = set(map(type, keys))
+  if key_types <= { int, bool }:
+    return _fold_indices(keys, reverse)
+  if key_types == { float }:
+    # Adding 0.0 turns -0.0 into 0.0, which it compares equal to
+    doubles = typed_array('d', [value + 0.0 for value in keys])
+    bits = typed_array('q', doubles.tobytes())
+    return _fold_indices([value if value >= 0 else value ^ FLOAT_ORDER_MASK for value in bits], reverse)
+
+  if reverse:
+    return [(value, -index) for index, value in enumerate(keys)]
+  return [(value, index) for index, value in enumerate(keys)]
+
+def undecorate(items, reverse=False):
+  '''
+  Returns the permutation of indices held by items from `decorate`, once sorted
+  '''
+  if items and type(items[0]) is tuple:
+    if reverse:
+      return [-index for _, index in reversed(items)]
+    return [index for _, index in items]
+  length = len(items)
+  return typed_array('q', (item % length for item in items))
+
+def apply_permutation(array, order):
+  '''
+  Rearranges the array in place so that array[i] becomes the old array[order[i]]
+  '''
+  values = (array[index] for index in order)
+  array[:] = typed_array(array.typecode, values) if isinstance(array, typed_array) else list(values)
+  return array
+
+def _fold_indices(keys, reverse):
+  length = len(keys)
+  if reverse:
+    highest = max(keys, default=0)
+    return [(highest - value) * length + index for index, value in enumerate(keys)]
+  lowest = min(keys, default=0)
+  return [(value - lowest) * length + index for index, value in enumerate(keys)]
+
+# Test cases
+_records = ['b2', 'a2', 'c1', 'd3', 'e1']
+for _key in (lambda record: int(record[1]), lambda record: float(record[1]) - 2.0, lambda record: record[1]):
+  for _reverse in (False, True):
+    _items = decorate(_records, _key, _reverse)
+    _items.sort()
+    assert [_records[index] for index in undecorate(_items, _reverse)] == sorted(_records, key=_key, reverse=_reverse)
+
+assert list(undecorate(sorted(decorate([0.0, -0.0, -1.5, float('inf')], float)))) == [2, 0, 1, 3]
+assert list(undecorate(decorate([], int))) == []
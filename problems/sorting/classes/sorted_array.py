@@ -0,0 +1,134 @@
+from bisect import bisect_left, bisect_right, insort_right
+from itertools import islice
+from operator import le
+
+def is_sorted(values):
+  '''
+  An O(n) check that the values are in non-decreasing order. Pairs of neighbours are
+  compared by `map(operator.le, ...)`, which runs without a Python level call per
+  element.
+  '''
+  return all(map(le, values, islice(values, 1, None)))
+
+class SortedArray:
+  '''
+  A list which is known to be sorted. Sortedness is checked once on construction and
+  then maintained by every mutation, so searches over a SortedArray never need to
+  validate it again.
+
+  Supports the read-only sequence protocol (so it can be passed anywhere a sorted
+  list is expected), plus bisect based insertion and deletion:
+   * insert, remove: O(n) time (a single memmove) | O(1) space
+   * index, count, __contains__: O(log(n)) time | O(1) space
+   * Item assignment only checks the neighbours of the assigned index: O(1) time
+  '''
+  def __init__(self, values=()):
+    values = list(values)
+    if not is_sorted(values):
+      raise Exception('Input <array> is not in sorted order')
+    self.values = values
+
+  @classmethod
+  def from_unsorted(cls, values):
+    return cls(sorted(values))
+
+  def __len__(self):
+    return len(self.values)
+
+  def __getitem__(self, index):
+    return self.values[index]
+
+  def __setitem__(self, index, value):
+    values = self.values
+    index = range(len(values))[index]
+    if (index > 0 and value < values[index - 1]) or (index < len(values) - 1 and values[index + 1] < value):
+      raise Exception(f'Assigning {value} at index {index} would break the sorted order')
+    values[index] = value
+
+  def __iter__(self):
+    return iter(self.values)
+
+  def __reversed__(self):
+    return reversed(self.values)
+
+  def __contains__(self, value):
+    index = bisect_left(self.values, value)
+    return index < len(self.values) and self.values[index] == value
+
+  def __eq__(self, other):
+    if isinstance(other, SortedArray):
+      return self.values == other.values
+    return self.values == other
+
+  def __repr__(self):
+    return f'SortedArray({self.values})'
+
+  def insert(self, value):
+    '''
+    Inserts the value after any equal values and returns its index
+    '''
+    index = bisect_right(self.values, value)
+    self.values.insert(index, value)
+    return index
+
+  def remove(self, value):
+    '''
+    Removes the first occurrence of the value, raising a ValueError if there is none
+    '''
+    del self.values[self.index(value)]
+
+  def pop(self, index=-1):
+    return self.values.pop(index)
+
+  def index(self, value):
+    '''
+    Returns the index of the first occurrence of the value, raising a ValueError if
+    there is none
+    '''
+    index = bisect_left(self.values, value)
+    if index == len(self.values) or self.values[index] != value:
+      raise ValueError(f'{value} is not in the array')
+    return index
+
+  def count(self, value):
+    return bisect_right(self.values, value) - bisect_left(self.values, value)
+
+  def bisect_left(self, value):
+    return bisect_left(self.values, value)
+
+  def bisect_right(self, value):
+    return bisect_right(self.values, value)
+
+  def extend(self, values):
+    '''
+    Adds every value, merging them in with a single sort when there are many
+    '''
+    values = list(values)
+    if len(values) * 8 < len(self.values):
+      for value in values:
+        insort_right(self.values, value)
+    else:
+      self.values.extend(values)
+      self.values.sort()
+
+# Test cases
+assert is_sorted([]) and is_sorted([1]) and is_sorted([1, 1, 2]) and not is_sorted([2, 1])
+
+_array = SortedArray([1, 3, 3, 7])
+assert len(_array) == 4 and _array[1] == 3 and _array[-1] == 7 and list(_array) == [1, 3, 3, 7]
+assert _array.insert(3) == 3 and _array.insert(0) == 0 and _array.insert(9) == 6
+assert _array == [0, 1, 3, 3, 3, 7, 9]
+assert 3 in _array and 4 not in _array and _array.count(3) == 3 and _array.index(3) == 2
+_array.remove(3)
+assert _array == [0, 1, 3, 3, 7, 9]
+_array[2] = 2
+assert _array == [0, 1, 2, 3, 7, 9]
+_array.extend([8, 4, -1])
+assert _array == [-1, 0, 1, 2, 3, 4, 7, 8, 9]
+
+for _invalid in (lambda: SortedArray([2, 1]), lambda: _array.__setitem__(0, 100)):
+  try:
+    _invalid()
+    assert False
+  except Exception as error:
+    assert 'sorted order' in str(error)
@@ -0,0 +1,258 @@
+
+from enum import Enum
+from topological_sort import topological_sort
+
+class DynamicTopologicalOrder():
+  '''
+  Maintains a topological ordering of a directed acyclic graph while edges are
+  inserted and deleted, using the Pearce-Kelly algorithm. Rather than re-sorting the
+  whole graph, inserting an edge that violates the current order only reorders the
+  vertices positioned between its two endpoints, and deleting an edge never
+  invalidates an order.
+
+  An order can also follow a mutable graph such as `DynamicAdjacencyList` (see
+  `from_graph`), in which case it works directly over the graph's own adjacency
+  lists. It validates every edge before the graph adds it, so an edge closing a
+  cycle is rejected with the graph unchanged, however it's added.
+
+  Edge insertion: O(a*log(a) + e_a) time, where a is the number of vertices in the
+  affected region and e_a the number of edges leaving them
+  '''
+  def __init__(self, vertices, edges, graph=None):
+    self.ordering = topological_sort(vertices, edges)
+    if len(self.ordering) != len(vertices):
+      raise Exception('Input graph contains a cycle, no topological ordering exists')
+    self.position = { vertex: index for index, vertex in enumerate(self.ordering) }
+
+    self.graph = graph
+    if graph is not None:
+      # The graph keeps its successor and predecessor lists up to date itself
+      self.successors, self.predecessors = graph.edges, graph.predecessors
+      graph.add_validator(self.validate_change)
+      graph.add_listener(self.on_change)
+      return
+
+    self.successors = { vertex: set() for vertex in vertices }
+    self.predecessors = { vertex: set() for vertex in vertices }
+    for origin, destination in edges:
+      self.successors[origin].add(destination)
+      self.predecessors[destination].add(origin)
+
+  @classmethod
+  def from_graph(cls, graph):
+    '''
+    Builds the order of a `DynamicAdjacencyList` (any graph over the vertices 0..n-1
+    with `edges` and `predecessors` lists and `add_validator` and `add_listener`
+    methods) and registers it with the graph, so it follows every edge the graph gains
+    or loses
+    '''
+    vertices = list(range(len(graph)))
+    edges = [(origin, destination) for origin in vertices for destination in graph.edges[origin]]
+    return cls(vertices, edges, graph)
+
+  def __iter__(self):
+    self.__add_graph_vertices()
+    return iter(self.ordering)
+
+  def validate_change(self, change, origin, destination):
+    '''
+    Called by a graph the order follows before it makes an edge change, where change
+    is an `EdgeChange` (ADDED or REMOVED). Repairs the order ahead of an added edge,
+    raising (so the graph rejects the edge) if it would close a cycle
+    '''
+    # A removed edge never invalidates the order
+    self.__add_graph_vertices()
+    if change.value > 0:
+      self.__repair(origin, destination)
+
+  def on_change(self, change, origin, destination):
+    '''
+    Applies an edge change, where change is an `EdgeChange` (ADDED or REMOVED), so an
+    order can be registered as a listener of a graph. An order following a graph was
+    already repaired when the change was validated, and only picks up new vertices.
+    '''
+    if self.graph is None:
+      (self.add_edge if change.value > 0 else self.remove_edge)(origin, destination)
+      return
+
+    self.__add_graph_vertices()
+
+  def add_vertex(self, vertex):
+    if self.graph is not None:
+      raise Exception('Vertices of an order following a graph are added to the graph')
+    if vertex in self.position:
+      raise Exception(f'Vertex {vertex} already exists')
+    self.__place(vertex)
+    self.successors[vertex] = set()
+    self.predecessors[vertex] = set()
+
+  def remove_edge(self, origin, destination):
+    if self.graph is not None:
+      self.graph.remove_edge(origin, destination)
+      return
+    # The current ordering stays valid when an edge disappears
+    self.successors[origin].discard(destination)
+    self.predecessors[destination].discard(origin)
+
+  def add_edge(self, origin, destination):
+    '''
+    Inserts the edge and repairs the ordering. Raises an exception (leaving the graph
+    unchanged) if the edge would introduce a cycle.
+    '''
+    if self.graph is not None:
+      # The graph validates the edge with this order before adding it
+      self.graph.add_edge(origin, destination)
+      return
+
+    self.__repair(origin, destination)
+    self.successors[origin].add(destination)
+    self.predecessors[destination].add(origin)
+
+  def __repair(self, origin, destination):
+    lower, upper = self.position[destination], self.position[origin]
+    if lower > upper:
+      # Already consistent with the current ordering
+      return
+
+    # Only vertices positioned within [lower, upper] can be out of order. Collect the
+    # ones reachable from the destination, and the ones reaching the origin
+    forward = self.__search(destination, self.successors, lambda index: index <= upper)
+    if origin in forward:
+      raise Exception(f'Edge ({origin}, {destination}) would create a cycle')
+    backward = self.__search(origin, self.predecessors, lambda index: lower <= index)
+    self.__reorder(backward, forward)
+
+  def __place(self, vertex):
+    self.position[vertex] = len(self.ordering)
+    self.ordering.append(vertex)
+
+  def __add_graph_vertices(self):
+    # Vertices added to a graph come with no edges, so they can go last
+    if self.graph is not None:
+      for vertex in range(len(self.ordering), len(self.graph)):
+        self.__place(vertex)
+
+  def __search(self, start, adjacency, in_region):
+    found, stack = { start }, [start]
+    while stack:
+      for neighbor in adjacency[stack.pop()]:
+        if neighbor not in found and in_region(self.position[neighbor]):
+          found.add(neighbor)
+          stack.append(neighbor)
+    return found
+
+  def __reorder(self, backward, forward):
+    # Reuse the positions both regions already occupy, placing every vertex that leads
+    # to the origin ahead of every vertex reached from the destination. Each region
+    # keeps its own relative order
+    by_position = lambda vertex: self.position[vertex]
+    vertices = sorted(backward, key=by_position) + sorted(forward, key=by_position)
+    positions = sorted(self.position[vertex] for vertex in vertices)
+    for vertex, index in zip(vertices, positions):
+      self.position[vertex] = index
+      self.ordering[index] = vertex
+
+def _is_topological(order, edges):
+  position = { vertex: index for index, vertex in enumerate(order) }
+  return all(position[origin] < position[destination] for origin, destination in edges)
+
+# Test cases
+_order = DynamicTopologicalOrder([1, 2, 3, 4], [[1, 2], [3, 4]])
+_order.add_edge(4, 1)
+assert _is_topological(list(_order), [[1, 2], [3, 4], [4, 1]])
+_order.add_vertex(5)
+_order.add_edge(2, 5)
+assert _is_topological(list(_order), [[1, 2], [3, 4], [4, 1], [2, 5]])
+try:
+  _order.add_edge(2, 3)
+  _cycle_rejected = False
+except Exception:
+  _cycle_rejected = True
+assert _cycle_rejected
+_order.remove_edge(4, 1)
+_order.add_edge(2, 3)
+assert _is_topological(list(_order), [[1, 2], [3, 4], [2, 5], [2, 3]])
+
+# An order following a graph. The graph lives in the graphs package, so this stand-in
+# mirrors the listener protocol of its `DynamicAdjacencyList`
+class _EdgeChange(Enum):
+  ADDED = 1
+  REMOVED = -1
+
+class _Graph:
+  def __init__(self, edges):
+    self.edges = [list(destinations) for destinations in edges]
+    self.predecessors = [[] for _ in edges]
+    for origin, destinations in enumerate(self.edges):
+      for destination in destinations:
+        self.predecessors[destination].append(origin)
+    self.changes, self.validators, self.listeners = [], [], []
+
+  def __len__(self):
+    return len(self.edges)
+
+  def add_validator(self, validator):
+    self.validators.append(validator)
+
+  def add_listener(self, listener):
+    self.listeners.append(listener)
+
+  def add_vertex(self):
+    self.edges.append([])
+    self.predecessors.append([])
+    return len(self.edges) - 1
+
+  def add_edge(self, origin, destination):
+    self.__validate(_EdgeChange.ADDED, origin, destination)
+    self.edges[origin].append(destination)
+    self.predecessors[destination].append(origin)
+    self.__record(_EdgeChange.ADDED, origin, destination)
+
+  def remove_edge(self, origin, destination):
+    self.__validate(_EdgeChange.REMOVED, origin, destination)
+    self.edges[origin].remove(destination)
+    self.predecessors[destination].remove(origin)
+    self.__record(_EdgeChange.REMOVED, origin, destination)
+
+  def __validate(self, change, origin, destination):
+    for validator in self.validators:
+      validator(change, origin, destination)
+
+  def __record(self, change, origin, destination):
+    self.changes.append((change, origin, destination))
+    for listener in self.listeners:
+      listener(change, origin, destination)
+
+def _graph_edges(graph):
+  return [(origin, destination) for origin in range(len(graph)) for destination in graph.edges[origin]]
+
+_graph = _Graph([[1], [], [3], []])
+_order = DynamicTopologicalOrder.from_graph(_graph)
+assert _order.successors is _graph.edges
+_graph.add_edge(3, 0)
+assert _is_topological(list(_order), _graph_edges(_graph))
+_graph.add_edge(1, _graph.add_vertex())
+_graph.add_edge(2, 4)
+assert _is_topological(list(_order), _graph_edges(_graph)) and len(list(_order)) == 5
+
+# A cycle is rejected before the graph changes, whether the edge is added through the
+# order or to the graph itself, so listeners registered after the order never see it
+_later_changes = []
+_graph.add_listener(lambda *change: _later_changes.append(change))
+for _add_edge in (_order.add_edge, _graph.add_edge):
+  try:
+    _add_edge(0, 2)
+    assert False
+  except Exception as error:
+    assert 'cycle' in str(error)
+assert len(_graph.changes) == 3 and not _later_changes and 2 not in _graph.edges[0]
+assert _is_topological(list(_order), _graph_edges(_graph))
+_order.remove_edge(3, 0)
+_order.add_edge(0, 2)
+assert _is_topological(list(_order), _graph_edges(_graph))
+
+# A listener also keeps an order which owns its edges in step with any change log
+_replica = DynamicTopologicalOrder([0, 1, 2, 3, 4], [(0, 1), (2, 3)])
+for _change in _graph.changes:
+  _replica.on_change(*_change)
+assert _is_topological(list(_replica), _graph_edges(_graph))
@@ -0,0 +1,190 @@
+import argparse
+import heapq
+import os
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+DEFAULT_MEMORY_BUDGET = 64 * 1024 * 1024
+
+# The most runs merged at once, keeping the number of open files and read buffers
+# bounded. More runs than this are merged over several passes
+MAX_FAN_IN = 256
+
+# Records read per block while loading a chunk
+READ_BLOCK_RECORDS = 4096
+
+def external_merge_sort(input_path, output_path, record_size, memory_budget=DEFAULT_MEMORY_BUDGET,
+                        key_offset=0, key_size=None, workers=1, temp_dir=None):
+  '''
+  Sorts a file of fixed-width binary records that may be far larger than memory,
+  comparing records by the bytes at [key_offset, key_offset + key_size) (the whole
+  record by default). The sort is stable.
+
+  Works in two phases:
+   1. Run generation: the input is cut into chunks that fit the memory budget, and
+      each chunk is sorted and spilled to a temporary run file. With workers > 1 the
+      chunks are sorted in parallel in a process pool (each worker reads its own
+      chunk, so the records are never pickled)
+   2. A k-way merge streams the runs through a heap of their smallest unmerged
+      records, reading each run in buffered blocks
+
+  O(n*log(n)) time | O(memory_budget) space, plus O(n) temporary disk space
+  '''
+  file_size = os.path.getsize(input_path)
+  if record_size <= 0 or file_size % record_size != 0:
+    raise Exception(f'Input size {file_size} is not a multiple of the record size {record_size}')
+  key_size = record_size - key_offset if key_size is None else key_size
+  if key_offset < 0 or key_size <= 0 or key_offset + key_size > record_size:
+    raise Exception(f'Key [{key_offset}, {key_offset + key_size}) does not fit in a record')
+
+  # Each worker holds a chunk at once, so split the budget between them, counting
+  # what a record really costs in memory rather than just its size on disk
+  workers = max(1, workers)
+  records_per_chunk = max(1, memory_budget // (workers * _bytes_per_record(record_size, key_offset, key_size)))
+  num_records = file_size // record_size
+  chunks = [
+    (start, min(records_per_chunk, num_records - start))
+    for start in range(0, num_records, records_per_chunk)
+  ]
+
+  with tempfile.TemporaryDirectory(dir=temp_dir) as run_dir:
+    arguments = [(input_path, start, count, record_size, key_offset, key_size, run_dir) for start, count in chunks]
+    if workers == 1 or len(chunks) == 1:
+      runs = [_write_sorted_run(*argument) for argument in arguments]
+    else:
+      with ProcessPoolExecutor(max_workers=workers) as executor:
+        runs = list(executor.map(_write_sorted_run, *zip(*arguments)))
+
+    # Merge in passes of at most MAX_FAN_IN runs until a single pass can finish the job
+    while len(runs) > MAX_FAN_IN:
+      runs = [
+        _merge_runs(runs[i:i+MAX_FAN_IN], _new_run_path(run_dir), record_size, key_offset, key_size, memory_budget)
+        for i in range(0, len(runs), MAX_FAN_IN)
+      ]
+    _merge_runs(runs, output_path, record_size, key_offset, key_size, memory_budget)
+
+def _write_sorted_run(input_path, start, count, record_size, key_offset, key_size, run_dir):
+  path = _new_run_path(run_dir)
+  with open(input_path, 'rb') as file:
+    file.seek(start * record_size)
+    if key_offset == 0 and key_size == record_size:
+      # Records compare whole, so sort them as they are, reading them in blocks so the
+      # chunk is never held twice
+      records = [None] * count
+      for first in range(0, count, READ_BLOCK_RECORDS):
+        block = file.read(min(READ_BLOCK_RECORDS, count - first) * record_size)
+        for i in range(0, len(block), record_size):
+          records[first + i // record_size] = block[i:i+record_size]
+      records.sort()
+      with open(path, 'wb') as output:
+        output.writelines(records)
+      return path
+
+    data = file.read(count * record_size)
+
+  # Otherwise keep the chunk in one buffer and sort a tag per record: its key followed
+  # by its index, which keeps equal keys in input order. The records are then written
+  # out of the buffer in the order of the sorted tags
+  tags = [None] * count
+  for index in range(count):
+    offset = index * record_size + key_offset
+    tags[index] = data[offset:offset+key_size] + index.to_bytes(8, 'big')
+  tags.sort()
+
+  view = memoryview(data)
+  with open(path, 'wb') as output:
+    for tag in tags:
+      offset = int.from_bytes(tag[-8:], 'big') * record_size
+      output.write(view[offset:offset+record_size])
+  return path
+
+def _bytes_per_record(record_size, key_offset, key_size):
+  # The memory run generation holds per record: a list slot and a bytes object
+  # (rounded up to the allocator's 16 byte blocks), plus up to half a slot of scratch
+  # space for the merges of list.sort. Keyed sorts hold the record in the chunk's
+  # buffer and the bytes object is its (key, index) tag
+  if key_offset == 0 and key_size == record_size:
+    return 8 + _allocated_size(record_size) + 4
+  return record_size + 8 + _allocated_size(key_size + 8) + 4
+
+def _allocated_size(length):
+  return (sys.getsizeof(b'') + length + 15) // 16 * 16
+
+def _new_run_path(run_dir):
+  descriptor, path = tempfile.mkstemp(dir=run_dir, suffix='.run')
+  os.close(descriptor)
+  return path
+
+def _merge_runs(runs, output_path, record_size, key_offset, key_size, memory_budget):
+  # Split the budget evenly between one read buffer per run and the write buffer, plus
+  # one more for the old block a run still holds while it reads its next one
+  buffer_size = max(record_size, (memory_budget // (len(runs) + 2)) // record_size * record_size)
+  key = None
+  if key_offset != 0 or key_size != record_size:
+    key = lambda record: record[key_offset:key_offset+key_size]
+
+  # heapq.merge breaks ties by the order of its inputs, and runs are listed in input
+  # order, so equal keys keep their original order
+  streams = [_read_records(path, record_size, buffer_size) for path in runs]
+  with open(output_path, 'wb', buffering=buffer_size) as output:
+    for record in heapq.merge(*streams, key=key):
+      output.write(record)
+
+  for path in runs:
+    os.remove(path)
+  return output_path
+
+def _read_records(path, record_size, buffer_size):
+  with open(path, 'rb', buffering=0) as file:
+    while True:
+      block = file.read(buffer_size)
+      if not block:
+        return
+      for i in range(0, len(block), record_size):
+        yield block[i:i+record_size]
+
+def _parse_size(text):
+  units = { 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3 }
+  if text[-1:].upper() in units:
+    return int(text[:-1]) * units[text[-1].upper()]
+  return int(text)
+
+def main(argv=None):
+  parser = argparse.ArgumentParser(description='Sort a file of fixed-width binary records larger than memory')
+  parser.add_argument('input', help='path of the file to sort')
+  parser.add_argument('output', help='path to write the sorted file to')
+  parser.add_argument('--record-size', type=int, required=True, help='size of each record in bytes')
+  parser.add_argument('--key-offset', type=int, default=0, help='byte offset of the sort key within a record')
+  parser.add_argument('--key-size', type=int, default=None, help='size of the sort key in bytes (default: rest of the record)')
+  parser.add_argument('--memory', type=_parse_size, default=DEFAULT_MEMORY_BUDGET, help='memory budget, e.g. 512M (default: 64M)')
+  parser.add_argument('--workers', type=int, default=1, help='processes used to generate runs (default: 1)')
+  parser.add_argument('--temp-dir', default=None, help='directory for temporary run files')
+  args = parser.parse_args(argv)
+  external_merge_sort(
+    args.input, args.output, args.record_size, args.memory,
+    args.key_offset, args.key_size, args.workers, args.temp_dir
+  )
+
+# Test cases
+def _check_sorts_file():
+  records = [bytes([value, index]) for index, value in enumerate([9, 3, 7, 3, 1, 9, 0, 5, 3])]
+  with tempfile.TemporaryDirectory() as directory:
+    input_path, output_path = os.path.join(directory, 'in'), os.path.join(directory, 'out')
+    with open(input_path, 'wb') as file:
+      file.write(b''.join(records))
+
+    # A budget of a few records forces several runs and a multi-way merge
+    external_merge_sort(input_path, output_path, 2, memory_budget=8, key_size=1)
+    with open(output_path, 'rb') as file:
+      assert file.read() == b''.join(sorted(records, key=lambda record: record[0]))
+
+    # Whole records compare as they are
+    external_merge_sort(input_path, output_path, 2, memory_budget=8)
+    with open(output_path, 'rb') as file:
+      assert file.read() == b''.join(sorted(records))
+
+_check_sorts_file()
+
+if __name__ == '__main__':
+  main()
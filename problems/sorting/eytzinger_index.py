@@ -0,0 +1,135 @@
+from array import array as typed_array
+
+class EytzingerIndex:
+  '''
+  A static search index over a sorted array, stored in Eytzinger (breadth first)
+  order: the root of the implicit binary search tree sits at slot 1 and the children
+  of slot k at slots 2k and 2k+1. The first few levels of the tree, which every
+  search passes through, are packed together at the front of the buffer, and a
+  search only ever moves forward through memory, rather than jumping back and forth
+  across the whole array as a binary search does.
+
+  Integer and float values are packed into a typed array, so the probes touch a
+  contiguous buffer rather than chasing a pointer per element.
+
+  The array is laid out once, in O(n) time, and each query then costs
+  O(log(n)) time | O(1) space. Every query answers in terms of indices into the
+  original sorted array, so results can be used interchangeably with those of
+  `binary_search` and `search_for_range`.
+  '''
+  def __init__(self, array):
+    if not all(array[i-1] <= array[i] for i in range(1, len(array))):
+      raise Exception('Input <array> is not in sorted order')
+
+    self.length = len(array)
+    # Slot 0 is unused so that the children of slot k are always 2k and 2k+1
+    tree = [array[0] if self.length else None] * (self.length + 1)
+    positions = typed_array('q', bytes(8 * (self.length + 1)))
+
+    # An in-order walk of the implicit tree visits its slots in sorted order
+    stack, slot, index = [], 1, 0
+    while stack or slot <= self.length:
+      while slot <= self.length:
+        stack.append(slot)
+        slot *= 2
+      slot = stack.pop()
+      tree[slot] = array[index]
+      positions[slot] = index
+      index += 1
+      slot = 2 * slot + 1
+
+    self.tree = _pack(tree)
+    self.positions = positions
+
+  def __len__(self):
+    return self.length
+
+  def lower_bound(self, target):
+    '''
+    Returns the index of the first value not less than the target, or len(array) if
+    every value is less than it
+    '''
+    return self.__position(self.__lower_bound_slot(target))
+
+  def upper_bound(self, target):
+    '''
+    Returns the index of the first value greater than the target, or len(array) if no
+    value is greater than it
+    '''
+    tree, length, slot = self.tree, self.length, 1
+    while slot <= length:
+      slot = 2 * slot + (not target < tree[slot])
+    return self.__position(_last_left_turn(slot))
+
+  def find(self, target):
+    '''
+    Returns the index of the target, or -1 if it's not in the array. Where the target
+    occurs several times its first index is returned.
+    '''
+    slot = self.__lower_bound_slot(target)
+    return self.positions[slot] if slot and self.tree[slot] == target else -1
+
+  def search_range(self, target):
+    '''
+    Returns the (first, last) indices holding the target, or (-1, -1) if it's not in
+    the array, matching `search_for_range`
+    '''
+    first = self.find(target)
+    if first == -1:
+      return -1, -1
+    return first, self.upper_bound(target) - 1
+
+  def count_in_range(self, low, high):
+    '''
+    Returns how many values lie in the closed interval [low, high]
+    '''
+    return max(0, self.upper_bound(high) - self.lower_bound(low))
+
+  def __lower_bound_slot(self, target):
+    # Descends without branching on the comparison: each step moves to the left or
+    # right child depending on whether the slot's value is less than the target
+    tree, length, slot = self.tree, self.length, 1
+    while slot <= length:
+      slot = 2 * slot + (tree[slot] < target)
+    return _last_left_turn(slot)
+
+  def __position(self, slot):
+    return self.length if slot == 0 else self.positions[slot]
+
+def _last_left_turn(slot):
+  # The search ends below a leaf. The answer is the last node where the search went
+  # left, so strip the trailing right turns (1 bits) and the left turn (0 bit) before
+  # them. A search which only ever went right ends at slot 0
+  return slot >> ((~slot) & (slot + 1)).bit_length()
+
+def _pack(values):
+  # Keeps ints fitting in 64 bits and floats in a contiguous typed buffer
+  items = values[1:]
+  if items and all(type(value) is int for value in items):
+    if -2**63 <= min(items) and max(items) < 2**63:
+      return typed_array('q', [0] + items)
+  if items and all(type(value) is float for value in items):
+    return typed_array('d', [0.0] + items)
+  return values
+
+# Test cases
+_array = [0, 1, 21, 33, 45, 45, 45, 45, 45, 45, 61, 71, 73]
+_index = EytzingerIndex(_array)
+assert len(_index) == 13
+assert _index.find(45) == 4 and _index.find(0) == 0 and _index.find(73) == 12
+assert _index.find(47) == -1 and _index.find(-1) == -1 and _index.find(74) == -1
+assert _index.lower_bound(45) == 4 and _index.upper_bound(45) == 10
+assert _index.lower_bound(-5) == 0 and _index.upper_bound(73) == 13
+assert _index.search_range(45) == (4, 9) and _index.search_range(47) == (-1, -1)
+assert _index.count_in_range(20, 61) == 9 and _index.count_in_range(62, 70) == 0
+
+for _length in range(20):
+  _values = [value // 2 for value in range(_length)]
+  _index = EytzingerIndex(_values)
+  for _target in range(-1, _length // 2 + 2):
+    _first = _values.index(_target) if _target in _values else -1
+    assert _index.find(_target) == _first
+    assert _index.search_range(_target) == ((_first, _first + _values.count(_target) - 1) if _first >= 0 else (-1, -1))
+
+assert EytzingerIndex(['apple', 'banana', 'cherry']).find('banana') == 1
+assert EytzingerIndex([0.5, 1.5, 2.5]).lower_bound(2.0) == 2
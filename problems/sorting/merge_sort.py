@@ -1,14 +1,76 @@
+import os
+from array import array as typed_array
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ProcessPoolExecutor
 from enum import Enum, auto
+from multiprocessing import shared_memory
+from classes.sort_keys import apply_permutation, decorate, undecorate
 
 class Strategy(Enum):
   Optimal = auto()
   Simple = auto()
+  Adaptive = auto()
+  Parallel = auto()
 
-def merge_sort(array, strategy=Strategy.Optimal):
+# Once one run wins this many comparisons in a row, the adaptive merge switches to
+# galloping (exponential search followed by a block copy)
+MIN_GALLOP = 7
+
+# Below this many elements the parallel strategy isn't worth a process pool
+PARALLEL_THRESHOLD = 50_000
+
+# Bounds of the int64 values the parallel strategy can hold in a shared buffer
+INT64_MIN, INT64_MAX = -2**63, 2**63 - 1
+
+def merge_sort(array, strategy=Strategy.Optimal, workers=None, key=None, reverse=False):
+  '''
+  Sorts the array with the chosen strategy. `workers` only applies to the parallel
+  strategy, and defaults to the number of CPUs. Every sort is stable, including
+  descending (reverse) ones.
+
+  With a key function, keys are computed once per element and paired with their
+  indices (numeric keys folded together with the index into a single integer), the
+  pairs are sorted with the chosen strategy, and the resulting permutation is applied
+  to the array (to a copy of it for the simple strategy, which never sorts in place).
+  The parallel strategy shares the folded keys between processes when they fit in 64
+  bits, and sorts anything else with the optimal strategy.
+
+  An `array.array` is copied out to a list, sorted, and written back (into a new
+  array for the simple strategy). Every read of an `array.array` creates a Python
+  object, which makes merging it in place about three times slower than merging a
+  list, so the copy trades a transient list of the values (as Python objects) for
+  speed. The parallel strategy shares an array of int64s or doubles with its workers
+  directly.
+  '''
+  if key is not None:
+    order = undecorate(_merge_sort_by_strategy(decorate(array, key, reverse), strategy, workers), reverse)
+    return apply_permutation(array[:] if strategy == Strategy.Simple else array, order)
+  if isinstance(array, typed_array) and strategy != Strategy.Parallel:
+    result = typed_array(array.typecode, merge_sort(array.tolist(), strategy, workers, reverse=reverse))
+    if strategy == Strategy.Simple:
+      return result
+    array[:] = result
+    return array
+  if reverse:
+    # Sorting the reversed input stably, then reversing the result, orders the
+    # elements descending while keeping equal elements in their original order
+    array.reverse()
+    result = _merge_sort_by_strategy(array, strategy, workers)
+    result.reverse()
+    if result is not array:
+      array.reverse()
+    return result
+  return _merge_sort_by_strategy(array, strategy, workers)
+
+def _merge_sort_by_strategy(array, strategy, workers):
   if strategy == Strategy.Optimal:
     return _merge_sort_optimal(array)
   elif strategy == Strategy.Simple:
     return _merge_sort_simple(array)
+  elif strategy == Strategy.Adaptive:
+    return _merge_sort_adaptive(array)
+  elif strategy == Strategy.Parallel:
+    return _merge_sort_parallel(array, workers or os.cpu_count())
   raise KeyError(f'Invalid strategy: {strategy}') 
 
 def _merge_sort_optimal(array):
@@ -16,7 +78,7 @@ def _merge_sort_optimal(array):
   Space optimized merge sort algorithm which performs the sorting in place.
    - O(n*log(n)) time | O(n) space
   '''
-  _merge_sort_in_place(array, array.copy(), 0, len(array)-1)
+  _merge_sort_in_place(array, array[:], 0, len(array)-1)
   return array
 
 def _merge_sort_in_place(main, auxiliary, start, stop):
@@ -66,7 +128,7 @@ def _merge_sort_simple(array):
 
 def _do_merge_simple(left, right):
   i, j = 0, 0
-  merged_array = []
+  merged_array = left[:0]
   while i < len(left) and j < len(right):
     if left[i] <= right[j]:
       merged_array.append(left[i])
@@ -86,6 +148,293 @@ def _do_merge_simple(left, right):
   
   return merged_array
 
+def _merge_sort_adaptive(array):
+  '''
+  Natural merge sort in the style of TimSort, which sorts in place and is stable.
+   * The array is split into its natural ascending (or strictly descending, which are
+     reversed) runs, so presorted input is mostly handled by run detection alone
+   * Runs shorter than a minimum length are extended with binary insertion sort
+   * Runs are kept on a stack whose lengths grow geometrically, so merges stay balanced
+   * Merges trim the prefix and suffix already in place and gallop through long
+     streaks won by one side, copying them in blocks
+   * A single auxiliary buffer is reused by every merge
+   - O(n*log(n)) time (O(n) on presorted input) | O(n) space
+  '''
+  length = len(array)
+  if length < 2:
+    return array
+
+  min_run = _min_run_length(length)
+  runs, auxiliary = [], array[:0]
+  start = 0
+  while start < length:
+    stop = _find_run(array, start, length)
+    if stop - start < min_run:
+      forced_stop = min(length, start + min_run)
+      _binary_insertion_sort(array, start, stop, forced_stop)
+      stop = forced_stop
+
+    runs.append((start, stop - start))
+    _collapse_runs(array, auxiliary, runs)
+    start = stop
+
+  # Merge whatever is left on the stack, newest runs first
+  while len(runs) > 1:
+    index = len(runs) - 2
+    if index > 0 and runs[index-1][1] < runs[index+1][1]:
+      index -= 1
+    _merge_runs_at(array, auxiliary, runs, index)
+  return array
+
+def _min_run_length(length):
+  # Take the six most significant bits of the length, adding one if any of the
+  # remaining bits are set, so that length / min_run is at or just below a power of two
+  remainder = 0
+  while length >= 64:
+    remainder |= length & 1
+    length >>= 1
+  return length + remainder
+
+def _find_run(array, start, length):
+  '''
+  Returns the end of the natural run beginning at start, reversing it in place if it
+  is strictly descending (strictness keeps the reversal stable)
+  '''
+  stop = start + 1
+  if stop == length:
+    return stop
+
+  if array[stop] < array[start]:
+    while stop < length and array[stop] < array[stop-1]:
+      stop += 1
+    array[start:stop] = array[start:stop][::-1]
+  else:
+    while stop < length and not array[stop] < array[stop-1]:
+      stop += 1
+  return stop
+
+def _binary_insertion_sort(array, start, sorted_stop, stop):
+  # array[start:sorted_stop] is already sorted, insert the rest of the slice into it.
+  # Inserting after equal elements (bisect_right) keeps the sort stable
+  for i in range(sorted_stop, stop):
+    value = array[i]
+    position = bisect_right(array, value, start, i)
+    array[position+1:i+1] = array[position:i]
+    array[position] = value
+
+def _collapse_runs(array, auxiliary, runs):
+  '''
+  Merges runs at the top of the stack until, for the three topmost run lengths
+  A, B, C (C newest), both A > B + C and B > C hold
+  '''
+  while len(runs) > 1:
+    index = len(runs) - 2
+    if (index > 0 and runs[index-1][1] <= runs[index][1] + runs[index+1][1]) or \
+       (index > 1 and runs[index-2][1] <= runs[index-1][1] + runs[index][1]):
+      if runs[index-1][1] < runs[index+1][1]:
+        index -= 1
+    elif runs[index][1] > runs[index+1][1]:
+      break
+    _merge_runs_at(array, auxiliary, runs, index)
+
+def _merge_runs_at(array, auxiliary, runs, index):
+  (start, first_length), (mid, second_length) = runs[index], runs[index+1]
+  runs[index:index+2] = [(start, first_length + second_length)]
+  _do_merge_galloping(array, auxiliary, start, mid, mid + second_length)
+
+def _do_merge_galloping(array, auxiliary, start, mid, stop):
+  '''
+  Stably merges the adjacent sorted runs array[start:mid] and array[mid:stop]
+  '''
+  # Left run elements no greater than the right run's first element, and right run
+  # elements no smaller than the left run's last element, are already in place
+  start = _gallop_right(array, array[mid], start, mid)
+  if start == mid:
+    return
+  stop = _gallop_left(array, array[mid-1], mid, stop)
+  if stop == mid:
+    return
+
+  # Move the left run into the auxiliary buffer and merge forwards into the array
+  left_stop = mid - start
+  auxiliary[:left_stop] = array[start:mid]
+  i, j, k = 0, mid, start
+  while i < left_stop and j < stop:
+
+    # Compare one element at a time until one side wins MIN_GALLOP times in a row
+    left_wins = right_wins = 0
+    while i < left_stop and j < stop and left_wins < MIN_GALLOP and right_wins < MIN_GALLOP:
+      if array[j] < auxiliary[i]:
+        array[k] = array[j]
+        j, right_wins, left_wins = j + 1, right_wins + 1, 0
+      else:
+        array[k] = auxiliary[i]
+        i, left_wins, right_wins = i + 1, left_wins + 1, 0
+      k += 1
+    if i == left_stop or j == stop:
+      break
+
+    # Then search ahead for where the streak ends and copy it as a single block
+    if left_wins >= MIN_GALLOP:
+      streak_stop = _gallop_right(auxiliary, array[j], i, left_stop)
+      array[k:k+streak_stop-i] = auxiliary[i:streak_stop]
+      k, i = k + streak_stop - i, streak_stop
+    else:
+      streak_stop = _gallop_left(array, auxiliary[i], j, stop)
+      array[k:k+streak_stop-j] = array[j:streak_stop]
+      k, j = k + streak_stop - j, streak_stop
+
+  # Whatever remains of the right run is already in place
+  array[k:k+left_stop-i] = auxiliary[i:left_stop]
+
+def _gallop_right(array, key, lo, hi):
+  '''
+  Index just past the last element of array[lo:hi] that is <= key, found by probing
+  lo, lo+1, lo+3, lo+7, ... before binary searching the bracketed window. Costs
+  O(log(d)) comparisons where d is the distance of the answer from lo.
+  '''
+  bound = 1
+  while lo + bound <= hi and not key < array[lo + bound - 1]:
+    bound *= 2
+  return bisect_right(array, key, lo + bound // 2, min(hi, lo + bound - 1))
+
+def _gallop_left(array, key, lo, hi):
+  '''
+  Index of the first element of array[lo:hi] that is >= key, by exponential search
+  '''
+  bound = 1
+  while lo + bound <= hi and array[lo + bound - 1] < key:
+    bound *= 2
+  return bisect_left(array, key, lo + bound // 2, min(hi, lo + bound - 1))
+
+def _merge_sort_parallel(array, workers):
+  '''
+  Multi-process merge sort for arrays of plain ints (fitting in 64 bits) or floats,
+  which sorts in place.
+   * The values are copied into a shared memory buffer, which is split into one
+     partition per worker, and every partition is merge sorted in a process pool
+   * Sorted partitions are merged pairwise in rounds. Each round's output is cut into
+     one segment per worker using merge path (co-rank) splitting, which finds where
+     every output segment starts in both input runs with a binary search, so each
+     worker merges an independent, equally sized slice of the output
+   * Rounds ping-pong between two shared buffers, so nothing is pickled but the
+     bounds of each task
+  A single worker runs the same tasks in this process, so timings over 1 to p
+  workers compare the same code. Arrays that are small, or hold anything other than
+  plain ints or floats, are sorted with the optimal strategy instead.
+   - O(n*log(n)/p + n*log(p)) time | O(n) space, for p workers
+  '''
+  typecode = _shared_typecode(array)
+  if len(array) < PARALLEL_THRESHOLD or typecode is None:
+    return _merge_sort_optimal(array)
+
+  workers = max(1, workers)
+  length, itemsize = len(array), typed_array(typecode).itemsize
+  blocks = [shared_memory.SharedMemory(create=True, size=length * itemsize) for _ in range(2)]
+  executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+  run_tasks = map if executor is None else executor.map
+  try:
+    view = blocks[0].buf.cast(typecode)
+    view[:] = typed_array(typecode, array)
+    view.release()
+
+    # Sort one partition per worker
+    bounds = [length * worker // workers for worker in range(workers + 1)]
+    runs = list(zip(bounds[:-1], bounds[1:]))
+    source, target = blocks
+    list(run_tasks(_sort_partition, *zip(*[(source.name, typecode, start, stop) for start, stop in runs])))
+
+    # Merge pairs of runs until one remains, spreading each round across all workers
+    while len(runs) > 1:
+      tasks, merged_runs = [], []
+      for index in range(0, len(runs), 2):
+        if index + 1 == len(runs):
+          start, stop = runs[index]
+          tasks.append((source.name, target.name, typecode, start, stop, stop, 0, stop - start))
+          merged_runs.append(runs[index])
+          continue
+
+        (start, mid), (_, stop) = runs[index], runs[index+1]
+        segments = max(1, round(workers * (stop - start) / length))
+        cuts = [(stop - start) * segment // segments for segment in range(segments + 1)]
+        for lower, upper in zip(cuts[:-1], cuts[1:]):
+          tasks.append((source.name, target.name, typecode, start, mid, stop, lower, upper))
+        merged_runs.append((start, stop))
+
+      list(run_tasks(_merge_segment, *zip(*tasks)))
+      runs, source, target = merged_runs, target, source
+
+    view = source.buf.cast(typecode)
+    array[:] = typed_array(typecode, view.tobytes()) if isinstance(array, typed_array) else view.tolist()
+    view.release()
+    return array
+  finally:
+    if executor is not None:
+      executor.shutdown()
+    for block in blocks:
+      block.close()
+      block.unlink()
+
+def _shared_typecode(array):
+  if isinstance(array, typed_array):
+    return array.typecode if array.typecode in 'qd' and array else None
+  if not isinstance(array, list) or not array:
+    return None
+  if all(type(value) is int for value in array):
+    return 'q' if INT64_MIN <= min(array) and max(array) <= INT64_MAX else None
+  if all(type(value) is float for value in array):
+    return 'd'
+  return None
+
+def _sort_partition(name, typecode, start, stop):
+  block = shared_memory.SharedMemory(name=name)
+  view = block.buf.cast(typecode)
+  try:
+    # The kernels run over a list copy, as every read of a typed buffer boxes the value
+    view[start:stop] = typed_array(typecode, _merge_sort_optimal(view[start:stop].tolist()))
+  finally:
+    view.release()
+    block.close()
+
+def _merge_segment(source_name, target_name, typecode, start, mid, stop, lower, upper):
+  '''
+  Writes outputs lower..upper-1 of the merge of the sorted runs source[start:mid] and
+  source[mid:stop] into target[start+lower:start+upper]
+  '''
+  source_block = shared_memory.SharedMemory(name=source_name)
+  target_block = shared_memory.SharedMemory(name=target_name)
+  source, target = source_block.buf.cast(typecode), target_block.buf.cast(typecode)
+  try:
+    left, right = source[start:mid], source[mid:stop]
+    left_lower, left_upper = _co_rank(lower, left, right), _co_rank(upper, left, right)
+    left_part = left[left_lower:left_upper].tolist()
+    right_part = right[lower-left_lower:upper-left_upper].tolist()
+
+    # Both parts are sorted, so this is a single linear merge of two runs (stable, with
+    # the left part winning ties since it comes first)
+    target[start+lower:start+upper] = typed_array(typecode, _do_merge_simple(left_part, right_part))
+    left.release()
+    right.release()
+  finally:
+    source.release()
+    target.release()
+    source_block.close()
+    target_block.close()
+
+def _co_rank(diagonal, left, right):
+  '''
+  Returns how many elements of the left run appear among the first `diagonal` outputs
+  of the stable merge of the sorted runs left and right, by binary search
+  '''
+  lo, hi = max(0, diagonal - len(right)), min(diagonal, len(left))
+  while lo < hi:
+    i = (lo + hi) // 2
+    if left[i] <= right[diagonal-i-1]:
+      lo = i + 1
+    else:
+      hi = i
+  return lo
+
 test_cases = [
   [],
   [3,2],
@@ -94,10 +443,48 @@ test_cases = [
   [33, 33, 33, 33, 33],
   [33, 33, 33, 33, 44],
   [16, 1, 53, 99, 16, 9, 100, 300, 12],
+  list(range(100)) + list(range(50)),
+  [i % 7 for i in range(200)],
+  list(range(150, 0, -1)) + [3, 2, 1],
 ]
 
 for test_case in test_cases:
   for strategy in Strategy:
     result = merge_sort(test_case.copy(), strategy)
     expected = sorted(test_case)
-    assert result == expected
\ No newline at end of file
+    assert result == expected
+
+    result = merge_sort(test_case.copy(), strategy, reverse=True)
+    assert result == sorted(test_case, reverse=True)
+
+_records = [('b', 2), ('a', 2), ('c', 1), ('d', 3), ('e', 1)]
+assert merge_sort(_records.copy(), key=lambda record: record[1]) == sorted(_records, key=lambda record: record[1])
+assert merge_sort(_records.copy(), key=lambda record: record[1], reverse=True) == \
+  sorted(_records, key=lambda record: record[1], reverse=True)
+assert merge_sort(_records.copy(), key=lambda record: record[0]) == sorted(_records)
+for strategy in Strategy:
+  _result = merge_sort(_records * 20, strategy, key=lambda record: record[1], reverse=True)
+  assert _result == sorted(_records * 20, key=lambda record: record[1], reverse=True)
+
+_unsorted = _records.copy()
+assert merge_sort(_unsorted, Strategy.Simple, key=lambda record: record[1])[0] == ('c', 1)
+assert _unsorted == _records
+
+try:
+  merge_sort(_records.copy(), 'Invalid', key=lambda record: record[1])
+  assert False
+except KeyError:
+  pass
+for strategy in Strategy:
+  assert merge_sort(typed_array('d', [2.5, -1.0, 2.0]), strategy, reverse=True) == typed_array('d', [2.5, 2.0, -1.0])
+  _typed = typed_array('q', test_cases[-1])
+  assert merge_sort(_typed, strategy) == typed_array('q', sorted(test_cases[-1]))
+if __name__ == '__main__':
+  # Sorting enough values to engage the process pool (kept behind a main guard, as
+  # worker processes may re-import this module)
+  _values = [(index * 7919) % 100_003 - 50_000 for index in range(100_003)]
+  assert merge_sort(_values.copy(), Strategy.Parallel, workers=3) == sorted(_values)
+  assert merge_sort(_values.copy(), Strategy.Parallel, workers=1) == sorted(_values)
+  _values = [value / 7 for value in _values]
+  assert merge_sort(_values.copy(), Strategy.Parallel, workers=2) == sorted(_values)
+  assert merge_sort(typed_array('d', _values), Strategy.Parallel, workers=2) == typed_array('d', sorted(_values))
@@ -1,14 +1,163 @@
+from array import array as typed_array
+from enum import Enum, auto
+from classes.sort_keys import apply_permutation, decorate, undecorate
 
-def quick_sort(array):
+class Strategy(Enum):
+  Introsort = auto()
+  Simple = auto()
+
+# Slices at or below this length are finished with insertion sort
+INSERTION_SORT_THRESHOLD = 16
+
+# Slices above this length take their pivot from a ninther rather than a median of three
+NINTHER_THRESHOLD = 40
+
+def quick_sort(array, strategy=Strategy.Introsort, key=None, reverse=False):
   '''
-  Prototypical quick sort algorithm using Python
+  Prototypical quick sort algorithm using Python, which sorts in place
+
+  With a key function, keys are computed once per element and paired with their
+  indices (numeric keys folded together with the index into a single integer), the
+  pairs are sorted with the chosen strategy (ties broken by index, so equal keys keep
+  their order), and the resulting permutation is applied to the array.
 
-  Time and Space Complexity:
-    * Best: O(n * log(n)) time | O(log(n)) space
-    * Avg: O(n * log(n)) time | O(log(n)) space
-    * Worst: O(n^2) time | O(log(n)) space
+  An `array.array` is copied out to a list, sorted, and written back. Every read of
+  an `array.array` creates a Python object, which makes sorting it in place about
+  three times slower than sorting a list, so the copy trades a transient list of the
+  values (as Python objects) for speed.
+
+  Time and Space Complexity by Strategy:
+    * Introsort: O(n * log(n)) time | O(log(n)) space, in every case
+    * Simple:
+      * Best: O(n * log(n)) time | O(log(n)) space
+      * Avg: O(n * log(n)) time | O(log(n)) space
+      * Worst: O(n^2) time | O(n) space
   '''
-  return _quick_sort(array, 0, len(array)-1)
+  if key is not None:
+    pairs = decorate(array, key, reverse)
+    quick_sort(pairs, strategy)
+    apply_permutation(array, undecorate(pairs, reverse))
+    return
+  if isinstance(array, typed_array):
+    values = array.tolist()
+    quick_sort(values, strategy, reverse=reverse)
+    array[:] = typed_array(array.typecode, values)
+    return
+
+  if strategy == Strategy.Introsort:
+    _introsort(array)
+  elif strategy == Strategy.Simple:
+    _quick_sort(array, 0, len(array)-1)
+  else:
+    raise KeyError(f'Invalid strategy: {strategy}')
+
+  if reverse:
+    array.reverse()
+
+def _introsort(array):
+  '''
+  Quick sort hardened against its worst cases:
+   * Pivots are the median of three (or of three medians of three, a "ninther"), so
+     sorted and reversed input split evenly instead of degrading to O(n^2)
+   * Three-way partitioning groups every element equal to the pivot in one pass, so
+     inputs with heavy duplicates shrink quickly
+   * Small slices are finished with insertion sort
+   * If the partitioning depth exceeds 2*log2(n), the slice falls back to heap sort,
+     bounding the worst case at O(n*log(n))
+   * An explicit stack replaces recursion, always deferring the larger side so the
+     stack never holds more than O(log(n)) slices
+  '''
+  if len(array) < 2:
+    return
+
+  stack = [(0, len(array)-1, 2 * (len(array).bit_length() - 1))]
+  while stack:
+    start, end, depth = stack.pop()
+    while end - start + 1 > INSERTION_SORT_THRESHOLD:
+      if depth == 0:
+        _heap_sort(array, start, end)
+        break
+      depth -= 1
+
+      lower, upper = _partition_three_way(array, start, end, _choose_pivot(array, start, end))
+      if lower - start < end - upper:
+        stack.append((upper+1, end, depth))
+        end = lower - 1
+      else:
+        stack.append((start, lower-1, depth))
+        start = upper + 1
+    else:
+      _insertion_sort(array, start, end)
+
+def _choose_pivot(array, start, end):
+  mid = (start + end) // 2
+  if end - start + 1 > NINTHER_THRESHOLD:
+    step = (end - start + 1) // 8
+    return _median_of_three(
+      _median_of_three(array[start], array[start+step], array[start+2*step]),
+      _median_of_three(array[mid-step], array[mid], array[mid+step]),
+      _median_of_three(array[end-2*step], array[end-step], array[end])
+    )
+  return _median_of_three(array[start], array[mid], array[end])
+
+def _median_of_three(a, b, c):
+  if a < b:
+    if b < c:
+      return b
+    return c if a < c else a
+  if a < c:
+    return a
+  return c if b < c else b
+
+def _partition_three_way(array, start, end, pivotVal):
+  '''
+  Dutch national flag partition of array[start:end+1] around pivotVal. Returns the
+  bounds (lower, upper) of the run of elements equal to the pivot, with smaller
+  elements before it and larger elements after it.
+  '''
+  lower, i, upper = start, start, end
+  while i <= upper:
+    value = array[i]
+    if value < pivotVal:
+      array[lower], array[i] = value, array[lower]
+      lower, i = lower + 1, i + 1
+    elif pivotVal < value:
+      array[upper], array[i] = value, array[upper]
+      upper -= 1
+    else:
+      i += 1
+  return lower, upper
+
+def _insertion_sort(array, start, end):
+  for i in range(start+1, end+1):
+    value = array[i]
+    j = i - 1
+    while j >= start and value < array[j]:
+      array[j+1] = array[j]
+      j -= 1
+    array[j+1] = value
+
+def _heap_sort(array, start, end):
+  size = end - start + 1
+  for root in range(size // 2 - 1, -1, -1):
+    _sift_down(array, start, root, size)
+  for last in range(size - 1, 0, -1):
+    array[start], array[start+last] = array[start+last], array[start]
+    _sift_down(array, start, 0, last)
+
+def _sift_down(array, offset, root, size):
+  value = array[offset+root]
+  while True:
+    child = 2 * root + 1
+    if child >= size:
+      break
+    if child + 1 < size and array[offset+child] < array[offset+child+1]:
+      child += 1
+    if not value < array[offset+child]:
+      break
+    array[offset+root] = array[offset+child]
+    root = child
+  array[offset+root] = value
 
 def _quick_sort(array, start, end):
   # We don't need to sort an array of size 1 (already sorted), or less
@@ -58,7 +207,44 @@ test_cases = [
   [16, 1, 53, 99, 16, 9, 100, 300, 12],
 ]
 
+test_cases.extend([
+  list(range(100)),
+  list(range(100, 0, -1)),
+  [i % 3 for i in range(100)],
+  list(range(50)) + list(range(50, 0, -1)),
+])
+
 for test_case in test_cases:
-  result = test_case.copy()
-  quick_sort(result)
-  assert result == sorted(test_case)
\ No newline at end of file
+  for strategy in Strategy:
+    result = test_case.copy()
+    quick_sort(result, strategy)
+    assert result == sorted(test_case)
+
+    result = test_case.copy()
+    quick_sort(result, strategy, reverse=True)
+    assert result == sorted(test_case, reverse=True)
+
+_records = [('b', 2), ('a', 2), ('c', 1), ('d', 3), ('e', 1)]
+_result = _records.copy()
+quick_sort(_result, key=lambda record: record[1], reverse=True)
+assert _result == sorted(_records, key=lambda record: record[1], reverse=True)
+for strategy in Strategy:
+  _result = _records * 20
+  quick_sort(_result, strategy, key=lambda record: record[1])
+  assert _result == sorted(_records * 20, key=lambda record: record[1])
+
+try:
+  quick_sort(_records.copy(), 'Invalid', key=lambda record: record[1])
+  assert False
+except KeyError:
+  pass
+
+for strategy in Strategy:
+  _typed = typed_array('q', test_cases[-1])
+  quick_sort(_typed, strategy, reverse=True)
+  assert _typed == typed_array('q', sorted(test_cases[-1], reverse=True))
+
+# Exercise the heap sort fallback directly
+_heap_sorted = [16, 1, 53, 99, 16, 9, 100, 300, 12]
+_heap_sort(_heap_sorted, 2, 7)
+assert _heap_sorted == [16, 1, 9, 16, 53, 99, 100, 300, 12]
\ No newline at end of file
@@ -0,0 +1,166 @@
+from array import array as typed_array
+from enum import Enum, auto
+from itertools import chain
+
+class Strategy(Enum):
+  Auto = auto()
+  Counting = auto()
+  LSD = auto()
+  MSD = auto()
+
+# Integers spanning at most this many values per element are counting sorted rather
+# than radix sorted
+COUNTING_RANGE_FACTOR = 2
+
+# Bits of the key consumed by each LSD pass (one bucket per digit value)
+RADIX_BITS = 8
+RADIX = 1 << RADIX_BITS
+RADIX_MASK = RADIX - 1
+
+# Slices at or below this length end the MSD recursion and are sorted directly
+MSD_CUTOFF = 32
+
+def radix_sort(array, strategy=Strategy.Auto):
+  '''
+  Sorts integers or byte strings without comparing elements to each other, by
+  distributing them into buckets on successive digits of their keys. Sorts in place
+  (a list or an `array.array`) and returns the array. Every strategy is stable.
+
+  Auto picks counting sort for integers spanning a small range, LSD radix sort for
+  other integers and MSD radix sort for byte strings.
+
+  Time and Space Complexity by Strategy, where k is the range of the values and w
+  their width in bits (or the length of the byte strings):
+   * Counting: O(n+k) time | O(n+k) space
+   * LSD: O(n*w/8) time | O(n) space
+   * MSD: O(n*w) time | O(n) space, usually far less as only distinguishing
+     prefixes are examined
+  '''
+  if len(array) < 2:
+    return array
+
+  if strategy == Strategy.Auto:
+    strategy = _choose_strategy(array)
+
+  if strategy == Strategy.Counting:
+    values = _counting_sort(_check_integers(array))
+  elif strategy == Strategy.LSD:
+    values = _lsd_radix_sort(_check_integers(array))
+  elif strategy == Strategy.MSD:
+    values = _msd_radix_sort(_check_byte_strings(array))
+  else:
+    raise KeyError(f'Invalid strategy: {strategy}')
+
+  if isinstance(array, typed_array):
+    array[:] = typed_array(array.typecode, values)
+  else:
+    array[:] = values
+  return array
+
+def _choose_strategy(array):
+  if isinstance(array[0], (bytes, bytearray)):
+    return Strategy.MSD
+  values = _check_integers(array)
+  if max(values) - min(values) <= COUNTING_RANGE_FACTOR * len(values):
+    return Strategy.Counting
+  return Strategy.LSD
+
+def _check_integers(array):
+  if isinstance(array, typed_array) and array.typecode in 'bBhHiIlLqQ':
+    return array
+  if not all(isinstance(value, int) for value in array):
+    raise TypeError('Radix sort of integers requires every value to be an int')
+  return array
+
+def _check_byte_strings(array):
+  if not all(isinstance(value, (bytes, bytearray)) for value in array):
+    raise TypeError('Radix sort of byte strings requires every value to be bytes')
+  return array
+
+def _counting_sort(array):
+  '''
+  Counts the occurrences of every value between the minimum and maximum, then writes
+  each value out as many times as it was counted
+  '''
+  minimum = min(array)
+  counts = [0] * (max(array) - minimum + 1)
+  for value in array:
+    counts[value - minimum] += 1
+
+  values = []
+  for offset, count in enumerate(counts):
+    if count:
+      values.extend([offset + minimum] * count)
+  return values
+
+def _lsd_radix_sort(array):
+  '''
+  Biases the values by the minimum, so negative values sort correctly and only the
+  bits of the range need passes, then stably distributes them into buckets on each
+  RADIX_BITS digit from the least significant up
+  '''
+  minimum = min(array)
+  width = (max(array) - minimum).bit_length()
+  values = [value - minimum for value in array]
+
+  for shift in range(0, width, RADIX_BITS):
+    buckets = [[] for _ in range(RADIX)]
+    appends = [bucket.append for bucket in buckets]
+    for value in values:
+      appends[(value >> shift) & RADIX_MASK](value)
+    values = list(chain.from_iterable(buckets))
+
+  return [value + minimum for value in values]
+
+def _msd_radix_sort(array):
+  '''
+  Distributes the byte strings on their first byte, then each bucket on the next byte
+  and so on. Strings which end at the current depth go before every longer string
+  sharing their prefix. Slices are kept on an explicit stack rather than recursed
+  into, and small slices are finished with the built-in sort.
+  '''
+  values = list(array)
+  stack = [(0, len(values), 0)]
+  while stack:
+    start, stop, depth = stack.pop()
+    if stop - start <= MSD_CUTOFF:
+      values[start:stop] = sorted(values[start:stop])
+      continue
+
+    # Bucket 0 holds the strings with no byte at this depth
+    buckets = [[] for _ in range(RADIX + 1)]
+    for value in values[start:stop]:
+      buckets[value[depth] + 1 if depth < len(value) else 0].append(value)
+
+    position = start
+    for digit, bucket in enumerate(buckets):
+      if not bucket:
+        continue
+      end = position + len(bucket)
+      values[position:end] = bucket
+      if digit > 0 and len(bucket) > 1:
+        stack.append((position, end, depth + 1))
+      position = end
+  return values
+
+# Test cases
+test_cases = [
+  [],
+  [3, 2],
+  [2, 3, 1],
+  [33, 33, 33, 33, 33],
+  [16, 1, 53, 99, 16, 9, 100, 300, 12],
+  [-5, 2**40, -2**40, 0, 7, -5, 255, 256, -256],
+  [(index * 7919) % 10007 - 5000 for index in range(1000)],
+  [index % 7 for index in range(200)],
+]
+
+for test_case in test_cases:
+  for strategy in (Strategy.Auto, Strategy.Counting, Strategy.LSD):
+    if strategy == Strategy.Counting and test_case and max(test_case) - min(test_case) > 10**6:
+      continue
+    assert radix_sort(test_case.copy(), strategy) == sorted(test_case)
+
+_byte_strings = [b'banana', b'', b'band', b'ban', b'apple', b'b', b'\xff', b'ban'] * 10
+assert radix_sort(_byte_strings.copy()) == sorted(_byte_strings)
+assert radix_sort(typed_array('i', [3, -1, 2]), Strategy.LSD) == typed_array('i', [-1, 2, 3])
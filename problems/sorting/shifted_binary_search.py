@@ -1,4 +1,6 @@
 
+from bisect import bisect_left
+from classes.sorted_array import SortedArray
 from classes.strategy import Strategy
 
 def shifted_binary_search(array, target, strategy=Strategy.Iteration):
@@ -7,8 +9,15 @@ def shifted_binary_search(array, target, strategy=Strategy.Iteration):
   of indices in an unknown direction, find and return the first found index of
   the array where array[index] == target.
   
-  If target does not exist in the array, returns -1
+  If target does not exist in the array, returns -1. Arrays with duplicate values
+  can cost up to O(n) time; for repeated queries over the same array, a
+  `RotatedSortedArray` finds the shift once and searches in O(log(n)) time.
   '''
+  if isinstance(array, SortedArray):
+    # A sorted array is shifted by zero, so it can be searched directly
+    index = bisect_left(array.values, target)
+    return index if index < len(array) and array[index] == target else -1
+
   if strategy == Strategy.Iteration:
     return _shifted_binary_search_iterative(array, target)
   elif strategy == Strategy.Recursion:
@@ -25,6 +34,11 @@ def _shifted_binary_search_iterative(array, target):
 
     if midVal == target:
       return mid
+
+    # With duplicates, equal left, mid and right values don't reveal which half is
+    # sorted (e.g. [1, 1, 1, 2, 1]). Neither end is the target, so shrink both ends
+    elif leftVal == midVal == rightVal:
+      left, right = left + 1, right - 1
     
     # If the left value is less than or equal to the mid value, we know the
     # left half of the current window is in sorted order, so we can tell if we
@@ -53,6 +67,9 @@ def _shifted_binary_search_recursive(array, target, left, right):
   leftVal, midVal, rightVal = array[left], array[mid], array[right]
   if midVal == target:
     return mid
+
+  elif leftVal == midVal == rightVal:
+    return _shifted_binary_search_recursive(array, target, left + 1, right - 1)
   
   elif leftVal <= midVal:
     if leftVal <= target and target < midVal:
@@ -72,4 +89,9 @@ for strategy in Strategy:
   assert shifted_binary_search([130, 133, 99, 100, 110], 133, strategy) == 1
   assert shifted_binary_search([99, 100, 110, 130, 133], 134, strategy) == -1
   assert shifted_binary_search([999, 1000, 64, 81, 144, 256, 512], 81, strategy) == 3
-  assert shifted_binary_search([999, 1000, 64, 81, 144, 256, 512], 420, strategy) == -1
\ No newline at end of file
+  assert shifted_binary_search([999, 1000, 64, 81, 144, 256, 512], 420, strategy) == -1
+  assert shifted_binary_search([1, 1, 1, 2, 1, 1], 2, strategy) == 3
+  assert shifted_binary_search([2, 1, 2, 2, 2], 1, strategy) == 1
+  assert shifted_binary_search([2, 2, 2, 0, 2], 0, strategy) == 3
+  assert shifted_binary_search(SortedArray([64, 81, 144, 256]), 144, strategy) == 2
+  assert shifted_binary_search(SortedArray([64, 81, 144, 256]), 100, strategy) == -1
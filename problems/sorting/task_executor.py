@@ -0,0 +1,241 @@
+import asyncio
+import heapq
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from enum import Enum, auto
+from topological_sort import KahnSorter
+
+class Pool(Enum):
+  Thread = auto()
+  Process = auto()
+
+class TaskStatus(Enum):
+  Succeeded = auto()
+  Failed = auto()
+  Cancelled = auto()
+
+class TaskResult:
+  '''
+  The outcome of one task. `start` and `end` are seconds since the run began, and
+  are None for a task which was cancelled before it could start.
+  '''
+  def __init__(self, vertex, status, value=None, error=None, start=None, end=None):
+    self.vertex = vertex
+    self.status = status
+    self.value = value
+    self.error = error
+    self.start = start
+    self.end = end
+
+  def duration(self):
+    return None if self.start is None else self.end - self.start
+
+def execute(vertices, edges, tasks, pool=Pool.Thread, max_workers=4, costs=None):
+  '''
+  Runs tasks[vertex]() for every vertex of the dependency graph (given in the same
+  form as `topological_sort`), starting each task as soon as every task it depends
+  on has succeeded. Returns a dictionary mapping each vertex to its TaskResult.
+
+   * At most max_workers tasks run at once, on a thread pool or (for CPU bound tasks
+     which can be pickled) a process pool
+   * When several tasks are ready, the one heading the longest remaining chain of
+     work (the critical path, weighted by `costs` if given, else counting tasks) is
+     started first, as delaying it would delay the whole run
+   * When a task raises, every task downstream of it is cancelled, while unrelated
+     tasks carry on
+   * A graph with a cycle raises a CycleError before any task is run
+  '''
+  if pool == Pool.Thread:
+    executor_type = ThreadPoolExecutor
+  elif pool == Pool.Process:
+    executor_type = ProcessPoolExecutor
+  else:
+    raise KeyError(f'Invalid pool: {pool}')
+
+  schedule = _Schedule(vertices, edges, costs)
+
+  origin = time.perf_counter()
+  with executor_type(max_workers=max_workers) as executor:
+    running = {}
+    while True:
+      while len(running) < max_workers and schedule.has_ready():
+        index = schedule.pop_ready()
+        running[executor.submit(_call_timed, tasks[schedule.vertices[index]])] = index
+      if not running:
+        break
+
+      finished, _ = wait(running, return_when=FIRST_COMPLETED)
+      for future in finished:
+        schedule.complete(running.pop(future), *future.result(), origin)
+
+  return schedule.results()
+
+async def execute_async(vertices, edges, tasks, max_concurrency=16, costs=None):
+  '''
+  The asyncio counterpart of `execute` for I/O bound work: tasks[vertex] is a
+  coroutine function, and at most max_concurrency of them are awaited at once. Takes
+  the same scheduling decisions and returns the same results as `execute`.
+  '''
+  schedule = _Schedule(vertices, edges, costs)
+  origin = time.perf_counter()
+  running = {}
+  while True:
+    while len(running) < max_concurrency and schedule.has_ready():
+      index = schedule.pop_ready()
+      running[asyncio.ensure_future(_await_timed(tasks[schedule.vertices[index]]))] = index
+    if not running:
+      break
+
+    finished, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+    for future in finished:
+      schedule.complete(running.pop(future), *future.result(), origin)
+
+  return schedule.results()
+
+def format_timings(results):
+  '''
+  Returns a table of every task's status, start time and duration, ordered by start
+  '''
+  rows = sorted(results.values(), key=lambda result: (result.start is None, result.start or 0))
+  lines = [f"{'task':<20} {'status':<10} {'start':>9} {'duration':>9}"]
+  for result in rows:
+    if result.start is None:
+      lines.append(f'{str(result.vertex):<20} {result.status.name:<10} {"-":>9} {"-":>9}')
+    else:
+      lines.append(f'{str(result.vertex):<20} {result.status.name:<10} {result.start:>9.4f} {result.duration():>9.4f}')
+  return '\n'.join(lines)
+
+def _call_timed(task):
+  # Runs inside the worker, so the timings exclude time spent queued. Errors are
+  # returned rather than raised so they can be attributed to the task
+  start = time.perf_counter()
+  try:
+    value, error = task(), None
+  except Exception as exception:
+    value, error = None, exception
+  return value, error, start, time.perf_counter()
+
+async def _await_timed(task):
+  start = time.perf_counter()
+  try:
+    value, error = await task(), None
+  except Exception as exception:
+    value, error = None, exception
+  return value, error, start, time.perf_counter()
+
+class _Schedule:
+  '''
+  The scheduling state shared by both executors: the in-degree bookkeeping of a
+  `KahnSorter`, plus a heap of ready vertices ordered by critical path length
+  '''
+  def __init__(self, vertices, edges, costs):
+    sorter = KahnSorter(vertices, edges)
+    self.vertices, self.next_map = sorter.vertices, sorter.next_map
+
+    # Walking the topological order backwards, each vertex's critical path is its own
+    # cost plus the longest critical path among the vertices which depend on it.
+    # Consuming the order also raises a CycleError for cyclic graphs up front
+    order = [sorter.index_of[vertex] for vertex in sorter.iter_order()]
+    self.priorities = [0] * len(self.vertices)
+    for index in reversed(order):
+      cost = 1 if costs is None else costs[self.vertices[index]]
+      self.priorities[index] = cost + max((self.priorities[next_vertex] for next_vertex in self.next_map[index]), default=0)
+
+    self.remaining = sorter.in_degrees.copy()
+    self.ready = [(-self.priorities[index], index) for index, degree in enumerate(self.remaining) if degree == 0]
+    heapq.heapify(self.ready)
+    self.outcomes = {}
+
+  def has_ready(self):
+    return len(self.ready) > 0
+
+  def pop_ready(self):
+    return heapq.heappop(self.ready)[1]
+
+  def complete(self, index, value, error, start, end, origin):
+    status = TaskStatus.Succeeded if error is None else TaskStatus.Failed
+    self.outcomes[index] = TaskResult(self.vertices[index], status, value, error, start - origin, end - origin)
+    if error is None:
+      for next_vertex in self.next_map[index]:
+        self.remaining[next_vertex] -= 1
+        if self.remaining[next_vertex] == 0:
+          heapq.heappush(self.ready, (-self.priorities[next_vertex], next_vertex))
+      return
+
+    # None of the downstream tasks can ever become ready, so cancel them all
+    stack = [index]
+    while stack:
+      for next_vertex in self.next_map[stack.pop()]:
+        if next_vertex not in self.outcomes:
+          self.outcomes[next_vertex] = TaskResult(self.vertices[next_vertex], TaskStatus.Cancelled)
+          stack.append(next_vertex)
+
+  def results(self):
+    return { self.vertices[index]: self.outcomes[index] for index in sorted(self.outcomes) }
+
+# Test cases
+def _fail():
+  raise ValueError('boom')
+
+def _check_execute():
+  started = []
+  def task(name, seconds=0.0):
+    def run():
+      started.append(name)
+      time.sleep(seconds)
+      return name.upper()
+    return run
+
+  # 'a' heads the longest chain (a -> c -> d -> e), so it starts first, while 'x',
+  # which nothing depends on, waits until the chain is down to its last task
+  vertices = ['x', 'b', 'a', 'c', 'd', 'e']
+  edges = [['a', 'c'], ['b', 'd'], ['c', 'd'], ['d', 'e']]
+  results = execute(vertices, edges, { vertex: task(vertex) for vertex in vertices }, max_workers=1)
+  assert started == ['a', 'b', 'c', 'd', 'x', 'e']
+  assert all(result.status == TaskStatus.Succeeded for result in results.values())
+  assert results['e'].value == 'E' and results['e'].start >= results['d'].end
+
+  # A failure cancels everything downstream of it, and nothing else
+  tasks = { vertex: task(vertex) for vertex in vertices }
+  tasks['c'] = _fail
+  results = execute(vertices, edges, tasks, max_workers=2)
+  assert results['c'].status == TaskStatus.Failed and isinstance(results['c'].error, ValueError)
+  assert results['d'].status == results['e'].status == TaskStatus.Cancelled
+  assert results['x'].status == results['a'].status == results['b'].status == TaskStatus.Succeeded
+  assert len(format_timings(results).splitlines()) == 7
+
+  # Critical paths weighted by cost: 'x' alone outweighs the chain through 'a'
+  started.clear()
+  execute(vertices, edges, { vertex: task(vertex) for vertex in vertices }, max_workers=1, costs={ 'x': 10, 'b': 1, 'a': 1, 'c': 1, 'd': 1, 'e': 1 })
+  assert started[0] == 'x'
+
+def _check_execute_async():
+  order = []
+  def task(name, seconds):
+    async def run():
+      order.append(name)
+      await asyncio.sleep(seconds)
+      return name
+    return run
+
+  tasks = { 'a': task('a', 0.02), 'b': task('b', 0.0), 'c': task('c', 0.0) }
+  results = asyncio.run(execute_async(['a', 'b', 'c'], [['b', 'c']], tasks, max_concurrency=2))
+  assert order == ['b', 'a', 'c'] and results['c'].end <= results['a'].end
+  assert all(result.status == TaskStatus.Succeeded for result in results.values())
+
+# The schedule alone can be checked without starting any pool or event loop
+_schedule = _Schedule(['x', 'b', 'a', 'c'], [['a', 'c'], ['b', 'c']], None)
+assert _schedule.priorities == [1, 2, 2, 1]
+assert [_schedule.pop_ready() for _ in range(3)] == [1, 2, 0] and not _schedule.has_ready()
+
+if __name__ == '__main__':
+  # Running tasks starts thread and process pools and an event loop, so these checks
+  # only run as a script (importing from inside a running event loop must still work,
+  # and process pool workers may re-import this module)
+  _check_execute()
+  _check_execute_async()
+
+  _results = execute([0, 1, 2], [[0, 2], [1, 2]], { 0: int, 1: float, 2: _fail }, pool=Pool.Process, max_workers=2)
+  assert _results[0].value == 0 and _results[1].value == 0.0
+  assert _results[2].status == TaskStatus.Failed
+  print(format_timings(_results))
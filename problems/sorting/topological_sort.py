@@ -1,6 +1,19 @@
 
+from collections import deque
+from itertools import accumulate, chain
+from classes.visited_states import VisitedStates
 from classes.visited_status import VisitedStatus
 
+class CycleError(Exception):
+  '''
+  Raised when a graph has no topological ordering. The `cycle` attribute lists the
+  vertices of one offending cycle in edge order, each pointing to the next and the
+  last pointing back to the first.
+  '''
+  def __init__(self, cycle):
+    super().__init__(f"Graph contains a cycle: {' -> '.join(map(str, cycle + cycle[:1]))}")
+    self.cycle = cycle
+
 def topological_sort(vertices, edges):
   '''
   Performs a topological sort on the given graph (as defined by the provided vertices and edges)
@@ -8,29 +21,40 @@ def topological_sort(vertices, edges):
 
   O(v+e) time | O(v+e) space
   '''
+  # Vertices which are exactly 0..n-1 already are their own positions, so the graph can
+  # be sorted without building any dictionaries
+  edges = edges if isinstance(edges, list) else list(edges)
+  if _is_dense(vertices, edges):
+    return _topological_sort_dense(len(vertices), edges)
+
+  # Label each vertex with its position so that all per-vertex state can live in flat,
+  # position indexed structures rather than dictionaries keyed by vertex. A vertex
+  # listed more than once keeps the position of its first occurrence
+  vertices = list(dict.fromkeys(vertices))
+  index_of = { vertex: index for index, vertex in enumerate(vertices) }
+
   # Generate a "previous" adjacency map which maps vertices to vertices which point to them
-  previous_map = get_previous_map(vertices, edges)
+  previous_map = _get_previous_positions(index_of, edges)
 
-  # Use a visited dictionary to tell us what the current state of a given node in the graph is,
-  # we can use an enum to standardize the status values used
-  visited = { vertex: VisitedStatus.Unvisited for vertex in vertices}
+  # Track the Unvisited/InProgress/Visited status of every vertex in a compact byte array
+  visited = VisitedStates(len(index_of))
 
-  # Create a new list to cache our ordering as we go
+  # Create a new list to cache our ordering (of vertex positions) as we go
   ordering = []
 
   # For each vertex in our graph, if we haven't already visited the vertex, perform a depth
   # first search of pre-vertices and add them to the ordering in a "post-order" traversal
-  for vertex in vertices:
-    if visited[vertex] != VisitedStatus.Visited:
+  for index in range(len(index_of)):
+    if not visited.is_visited(index):
 
       # The depth first search function will return True if a cycle has been detected, in
       # which case we want to immediately return an empty array (no topological ordering
       # exists for graphs with directed cycles)
-      cycleDetected = depth_first_search(vertex, ordering, visited, previous_map)
+      cycleDetected = _depth_first_search_positions(index, ordering, visited, previous_map)
       if cycleDetected:
         return []
 
-  return ordering
+  return [vertices[index] for index in ordering]
 
 def depth_first_search(vertex, ordering, visited, previous_map):
   '''
@@ -71,4 +95,296 @@ def get_previous_map(vertices, edges):
     origin, destination = edge
     previous_map[destination].append(origin)
 
-  return previous_map
\ No newline at end of file
+  return previous_map
+
+def _depth_first_search_positions(vertex, ordering, visited, previous_map):
+  '''
+  `depth_first_search` over vertex positions, with `visited` a VisitedStates and
+  `previous_map` the list built by `_get_previous_positions`
+
+  O(v+e) time | O(v+e) space
+  '''
+  states, visited_marker = visited.states, visited.visited_marker
+  if states[vertex] == visited.in_progress_marker:
+    # Cycle deteced!
+    return True
+
+  states[vertex] = visited.in_progress_marker
+
+  for preVertex in previous_map[vertex]:
+    if states[preVertex] != visited_marker:
+      
+      # We want to make sure we propogate any cycle detection immediately
+      cycleDetected = _depth_first_search_positions(preVertex, ordering, visited, previous_map)
+      if cycleDetected:
+        return True
+
+  ordering.append(vertex)
+  states[vertex] = visited_marker
+  return False
+
+def _get_previous_positions(index_of, edges):
+  '''
+  `get_previous_map` indexed by vertex position, as given by `index_of`
+
+  O(e) time | O(v+e) space
+  '''
+  previous_map = [[] for _ in range(len(index_of))]
+  for edge in edges:
+    origin, destination = edge
+    previous_map[index_of[destination]].append(index_of[origin])
+
+  return previous_map
+
+def _is_dense(vertices, edges):
+  if not all(type(vertex) is int and vertex == index for index, vertex in enumerate(vertices)):
+    return False
+  # Edges naming other vertices (or naming them by equal non int values, such as 1.0)
+  # are left to the general path, which looks them up by equality
+  if not set(map(type, chain.from_iterable(edges))) <= { int }:
+    return False
+  return not edges or (0 <= min(chain.from_iterable(edges)) and max(chain.from_iterable(edges)) < len(vertices))
+
+def _topological_sort_dense(num_vertices, edges):
+  '''
+  The same depth first search as `topological_sort`, producing the identical ordering,
+  for vertices labelled 0..n-1. The predecessors of every vertex are grouped into one
+  flat list by a counting sort over the edges (keeping edge order within each group),
+  and the search runs on an explicit stack, so long chains can't hit the recursion
+  limit.
+
+  O(v+e) time | O(v+e) space
+  '''
+  offsets = [0] * (num_vertices + 1)
+  for _, destination in edges:
+    offsets[destination + 1] += 1
+  offsets = list(accumulate(offsets))
+
+  cursor = offsets[:-1]
+  predecessors = [0] * len(edges)
+  for origin, destination in edges:
+    predecessors[cursor[destination]] = origin
+    cursor[destination] += 1
+
+  visited = VisitedStates(num_vertices)
+  states, in_progress_marker, visited_marker = visited.states, visited.in_progress_marker, visited.visited_marker
+  ordering = []
+  for root in range(num_vertices):
+    if states[root] == visited_marker:
+      continue
+
+    # Each frame holds a vertex and an iterator over its remaining predecessors
+    states[root] = in_progress_marker
+    stack = [(root, iter(predecessors[offsets[root]:offsets[root + 1]]))]
+    while stack:
+      vertex, pre_vertices = stack[-1]
+      for pre_vertex in pre_vertices:
+        state = states[pre_vertex]
+        if state == visited_marker:
+          continue
+        if state == in_progress_marker:
+          return []
+
+        # Vertices without predecessors are finished on the spot rather than pushed
+        start, stop = offsets[pre_vertex], offsets[pre_vertex + 1]
+        if start == stop:
+          ordering.append(pre_vertex)
+          states[pre_vertex] = visited_marker
+          continue
+        states[pre_vertex] = in_progress_marker
+        stack.append((pre_vertex, iter(predecessors[start:stop])))
+        break
+      else:
+        stack.pop()
+        ordering.append(vertex)
+        states[vertex] = visited_marker
+
+  return ordering
+
+def _get_next_positions(index_of, edges):
+  '''
+  An O(e) time | O(v+e) space operation to transform our inputs into a "next" adjacency
+  map, indexed by vertex position as given by `index_of`
+  '''
+  next_map = [[] for _ in range(len(index_of))]
+  for edge in edges:
+    origin, destination = edge
+    next_map[index_of[origin]].append(index_of[destination])
+
+  return next_map
+
+class KahnSorter:
+  '''
+  A topological sort engine based on in-degrees (Kahn's algorithm) rather than depth
+  first search. A vertex becomes ready as soon as every vertex pointing to it has been
+  output, so ready vertices can be streamed to a consumer before the rest of the order
+  is known. There is no recursion, so dependency chains of any length are supported.
+
+  Three ways of consuming the order:
+   * iter_order(): yields the vertices one at a time
+   * iter_waves(): yields lists of mutually independent vertices, where every vertex
+     of a wave only depends on vertices of earlier waves (so a whole wave can be
+     dispatched in parallel)
+   * get_ready()/done(): a scheduler takes the vertices which are ready, and reports
+     each one done when it finishes, releasing its dependents as early as possible
+
+  Each of them raises a CycleError naming an offending cycle, once no vertex can
+  become ready.
+
+  O(v+e) time | O(v+e) space
+  '''
+  def __init__(self, vertices, edges):
+    self.vertices = list(dict.fromkeys(vertices))
+    self.index_of = { vertex: index for index, vertex in enumerate(self.vertices) }
+    self.next_map = _get_next_positions(self.index_of, edges)
+
+    self.in_degrees = [0] * len(self.vertices)
+    for next_vertices in self.next_map:
+      for next_vertex in next_vertices:
+        self.in_degrees[next_vertex] += 1
+
+    # Scheduling state for get_ready()/done()
+    self.remaining = self.in_degrees.copy()
+    self.ready = [index for index, degree in enumerate(self.in_degrees) if degree == 0]
+    self.num_in_flight = 0
+    self.num_done = 0
+
+  def iter_order(self):
+    '''
+    Yields the vertices in a topological order, each as soon as all of its predecessors
+    have been yielded
+    '''
+    vertices, next_map, in_degrees = self.vertices, self.next_map, self.in_degrees.copy()
+    queue = deque(index for index, degree in enumerate(in_degrees) if degree == 0)
+    num_output = 0
+    while queue:
+      index = queue.popleft()
+      num_output += 1
+      yield vertices[index]
+      for next_vertex in next_map[index]:
+        in_degrees[next_vertex] -= 1
+        if in_degrees[next_vertex] == 0:
+          queue.append(next_vertex)
+
+    if num_output < len(vertices):
+      raise CycleError(self.__find_cycle(in_degrees))
+
+  def iter_waves(self):
+    '''
+    Yields lists of vertices, where no vertex of a list depends on another vertex of
+    the same list or of a later list
+    '''
+    vertices, next_map, in_degrees = self.vertices, self.next_map, self.in_degrees.copy()
+    wave = [index for index, degree in enumerate(in_degrees) if degree == 0]
+    num_output = 0
+    while wave:
+      num_output += len(wave)
+      yield [vertices[index] for index in wave]
+      next_wave = []
+      for index in wave:
+        for next_vertex in next_map[index]:
+          in_degrees[next_vertex] -= 1
+          if in_degrees[next_vertex] == 0:
+            next_wave.append(next_vertex)
+      wave = next_wave
+
+    if num_output < len(vertices):
+      raise CycleError(self.__find_cycle(in_degrees))
+
+  def get_ready(self):
+    '''
+    Returns every vertex which has become ready since the last call (possibly none, if
+    the vertices they wait on are still in flight)
+    '''
+    ready, self.ready = self.ready, []
+    self.num_in_flight += len(ready)
+    if not ready and not self.num_in_flight and self.num_done < len(self.vertices):
+      raise CycleError(self.__find_cycle(self.remaining))
+    return [self.vertices[index] for index in ready]
+
+  def done(self, *vertices):
+    '''
+    Marks vertices returned by get_ready() as finished, making ready any vertex whose
+    predecessors are now all done
+    '''
+    remaining, ready = self.remaining, self.ready
+    for vertex in vertices:
+      index = self.index_of[vertex]
+      self.num_in_flight -= 1
+      self.num_done += 1
+      for next_vertex in self.next_map[index]:
+        remaining[next_vertex] -= 1
+        if remaining[next_vertex] == 0:
+          ready.append(next_vertex)
+
+  def is_active(self):
+    '''
+    True while vertices remain to be handed out or finished
+    '''
+    return self.num_done < len(self.vertices)
+
+  def __find_cycle(self, in_degrees):
+    # Every vertex which was never output still has a predecessor which was never
+    # output, so walking backwards along such predecessors must revisit a vertex
+    stuck = [degree > 0 for degree in in_degrees]
+    stuck_predecessor = {}
+    for index, next_vertices in enumerate(self.next_map):
+      if stuck[index]:
+        for next_vertex in next_vertices:
+          if stuck[next_vertex]:
+            stuck_predecessor.setdefault(next_vertex, index)
+
+    position, path = {}, []
+    index = stuck.index(True)
+    while index not in position:
+      position[index] = len(path)
+      path.append(index)
+      index = stuck_predecessor[index]
+    return [self.vertices[index] for index in reversed(path[position[index]:])]
+
+# Test cases
+assert topological_sort([1, 2, 3, 4], [[1, 2], [1, 3], [3, 2], [4, 2], [4, 3]]) == [1, 4, 3, 2]
+assert topological_sort(['a', 'b', 'c'], [['c', 'b'], ['b', 'a']]) == ['c', 'b', 'a']
+assert topological_sort([1, 2, 3], [[1, 2], [2, 3], [3, 1]]) == []
+assert topological_sort([0], []) == [0]
+assert topological_sort([], []) == []
+assert topological_sort([0, 1, 2, 3], [[0, 1], [0, 2], [2, 1], [3, 1], [3, 2]]) == [0, 3, 2, 1]
+assert topological_sort([0, 1, 2], [[0, 1], [1, 2], [2, 0]]) == []
+assert topological_sort([0, 1, 2], [[0, 0]]) == []
+assert topological_sort(range(4), iter([(3, 2), (2, 1), (1, 0)])) == [3, 2, 1, 0]
+assert topological_sort([1, 0], [[1, 0]]) == [1, 0]
+assert topological_sort([1, 1, 2], [[1, 2]]) == [1, 2]
+assert topological_sort([0, 1], [(0, 1.0)]) == [0, 1]
+assert list(KahnSorter([1, 1, 2], [[1, 2]]).iter_order()) == [1, 2]
+
+_previous_map = get_previous_map(['a', 'b', 'c'], [['c', 'b'], ['b', 'a']])
+assert _previous_map == { 'a': ['b'], 'b': ['c'], 'c': [] }
+_ordering, _visited = [], { vertex: VisitedStatus.Unvisited for vertex in _previous_map }
+assert not depth_first_search('a', _ordering, _visited, _previous_map) and _ordering == ['c', 'b', 'a']
+
+_sorter = KahnSorter([1, 2, 3, 4], [[1, 2], [1, 3], [3, 2], [4, 2], [4, 3]])
+assert list(_sorter.iter_order()) == [1, 4, 3, 2]
+assert list(_sorter.iter_waves()) == [[1, 4], [3], [2]]
+assert _sorter.get_ready() == [1, 4] and _sorter.get_ready() == []
+_sorter.done(4)
+assert _sorter.get_ready() == []
+_sorter.done(1)
+assert _sorter.get_ready() == [3]
+_sorter.done(3)
+assert _sorter.get_ready() == [2] and _sorter.is_active()
+_sorter.done(2)
+assert not _sorter.is_active()
+
+# A chain far deeper than the recursion limit
+_chain = list(range(100_000))
+assert list(KahnSorter(_chain, [(vertex, vertex + 1) for vertex in _chain[:-1]]).iter_order()) == _chain
+
+_cyclic = KahnSorter(['a', 'b', 'c', 'd', 'e'], [['a', 'b'], ['b', 'c'], ['c', 'd'], ['d', 'b'], ['d', 'e']])
+assert _cyclic.get_ready() == ['a']
+_cyclic.done('a')
+for _consume in (lambda: list(_cyclic.iter_order()), lambda: list(_cyclic.iter_waves()), _cyclic.get_ready):
+  try:
+    _consume()
+    assert False
+  except CycleError as error:
+    assert error.cycle in (['b', 'c', 'd'], ['c', 'd', 'b'], ['d', 'b', 'c'])